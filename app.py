@@ -1,5 +1,6 @@
 import os
 import uuid
+import logging
 import traceback
 from dotenv import load_dotenv
 from flask import Flask, request, render_template, send_from_directory, url_for, flash, redirect
@@ -48,11 +49,12 @@ def index():
 def generate():
     """Handles form submission, triggers video generation."""
     try:
-        # Print form data for debugging
-        print("Form data received:")
-        for key, value in request.form.items():
-            if key != 'custom_texture_data':  # Skip logging the base64 data
-                print(f"{key}: {value}")
+        # Log form data for debugging (skipped entirely unless debug logging is on)
+        if app.logger.isEnabledFor(logging.DEBUG):
+            # Skip the base64 texture data and never log the API key
+            app.logger.debug("Form data received: %s",
+                             {key: value for key, value in request.form.items()
+                              if key not in ('custom_texture_data', 'api_key')})
                 
         # Check if a file was uploaded
         if 'texture_file' in request.files and request.files['texture_file'].filename:
@@ -103,10 +105,7 @@ def generate():
             'selected_font': request.form.get('selected_font', default='random'),
             'text_density': request.form.get('text_density', default='2', type=int)
         }
-        
 
-        
-        print(f"Background texture selected: {params['background_texture']}")
 
         # Basic Input Validation
         if not params['highlighted_text']:
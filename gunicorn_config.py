@@ -6,16 +6,20 @@ import multiprocessing
 import os
 
 # Worker Options
-workers = multiprocessing.cpu_count() * 2 + 1
+# One worker per core: each one also renders frames (in-process, or in its own render pool)
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
 worker_class = 'gthread'
-threads = 2
+# Threads only overlap the waits on AI provider HTTPS calls, render processes and ffmpeg;
+# in-process rendering holds the GIL, so a few are enough
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
 worker_connections = 1000
 timeout = 300  # 5 minutes for video processing
 keepalive = 2
 
 # Server Mechanics
 daemon = False
-raw_env = []
+# Tells the app how many server processes share the host, to size its render pools
+raw_env = [f'GUNICORN_WORKERS={workers}']
 
 # Logging
 errorlog = '-'
@@ -33,6 +37,11 @@ def on_starting(server):
     """Log when Gunicorn server is starting"""
     print("Starting Gunicorn server for Match Cut application")
 
+def worker_exit(server, worker):
+    """Stop the worker's render processes along with it"""
+    from modules.video_generator import shutdown_render_pool
+    shutdown_render_pool()
+
 def on_exit(server):
     """Clean up any temporary files when shutting down"""
     print("Shutting down Gunicorn server for Match Cut application")
@@ -1,50 +1,89 @@
 # AI Provider Modules
 import os
+import re
+import hashlib
+import functools
+import threading
+import importlib.util
 
 # --- AI Provider Imports ---
-MISTRAL_AVAILABLE = False
-GEMINI_AVAILABLE = False
-ANTHROPIC_AVAILABLE = False
-DEEPSEEK_AVAILABLE = False
-
-try:
-    from mistralai import UserMessage, SystemMessage, Mistral
-    MISTRAL_AVAILABLE = True
-except ImportError:
-    print("Mistral AI library not found. Install with: pip install mistralai")
-
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    print("Google Gemini library not found. Install with: pip install google-generativeai")
-
-try:
-    from anthropic import Anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    print("Anthropic library not found. Install with: pip install anthropic")
-
-try:
-    from deepseek import DeepSeek
-    DEEPSEEK_AVAILABLE = True
-except ImportError:
-    print("DeepSeek library not found. Install with: pip install deepseek")
+# The SDKs are heavy (google.generativeai alone pulls in gRPC and protobuf), so only check
+# here that they are installed and import them when a client is actually used.
+_PROVIDER_MODULES = {
+    'mistral': ("mistralai", "Mistral AI library not found. Install with: pip install mistralai"),
+    'gemini': ("google.generativeai", "Google Gemini library not found. Install with: pip install google-generativeai"),
+    'anthropic': ("anthropic", "Anthropic library not found. Install with: pip install anthropic"),
+    'deepseek': ("deepseek", "DeepSeek library not found. Install with: pip install deepseek"),
+}
+
+@functools.lru_cache(maxsize=None)
+def _check_available(provider):
+    """Checks once whether the SDK of a provider can be imported, without importing it."""
+    module_name, missing_message = _PROVIDER_MODULES.get(provider, (None, None))
+    if module_name is None:
+        return False
+    try:
+        available = importlib.util.find_spec(module_name) is not None
+    except ImportError:  # Parent package of a dotted name is missing
+        available = False
+    if not available:
+        print(missing_message)
+    return available
+
+MISTRAL_AVAILABLE = _check_available('mistral')
+GEMINI_AVAILABLE = _check_available('gemini')
+ANTHROPIC_AVAILABLE = _check_available('anthropic')
+DEEPSEEK_AVAILABLE = _check_available('deepseek')
+
+# Clients are reused across requests. The key uses a hash of the API key, but each cached
+# client still holds its raw key in memory for as long as it stays in the cache
+_CLIENT_CACHE = {}  # (provider, blake2b hex digest of the API key) -> client
+_CLIENT_CACHE_SIZE = 8
+_CLIENT_CACHE_LOCK = threading.Lock()  # Requests run on several gunicorn threads
 
 def initialize_ai_client(provider, api_key):
-    """Initialize the appropriate AI client based on provider."""
+    """Initialize the appropriate AI client based on provider, reusing one built earlier for the same key."""
     if not api_key:
         return None
 
+    # Gemini is configured through module-level state in genai, so its model is rebuilt each time
+    if provider == 'gemini':
+        return _create_ai_client(provider, api_key)
+
+    cache_key = (provider, hashlib.blake2b(api_key.encode(), digest_size=16).hexdigest())
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get(cache_key)
+        if client is None:
+            client = _create_ai_client(provider, api_key)
+            if client is not None:
+                if len(_CLIENT_CACHE) >= _CLIENT_CACHE_SIZE:
+                    _CLIENT_CACHE.pop(next(iter(_CLIENT_CACHE)))  # Drop the oldest entry
+                _CLIENT_CACHE[cache_key] = client
+    return client
+
+@functools.lru_cache(maxsize=None)
+def _shared_http_client():
+    """One keep-alive HTTP connection pool shared by the SDK clients that accept one,
+    so later requests skip the TCP and TLS handshakes. httpx comes with those SDKs."""
+    import httpx
+    return httpx.Client(timeout=httpx.Timeout(120.0, connect=10.0),
+                        limits=httpx.Limits(max_keepalive_connections=10))
+
+def _create_ai_client(provider, api_key):
+    """Builds a new client for the provider, or None if it is unavailable or fails to initialize."""
     try:
-        if provider == 'mistral' and MISTRAL_AVAILABLE:
-            return Mistral(api_key=api_key)
-        elif provider == 'gemini' and GEMINI_AVAILABLE:
+        if provider == 'mistral' and _check_available(provider):
+            from mistralai import Mistral
+            return Mistral(api_key=api_key, client=_shared_http_client())
+        elif provider == 'gemini' and _check_available(provider):
+            import google.generativeai as genai
             genai.configure(api_key=api_key)
             return genai.GenerativeModel('gemini-pro')
-        elif provider == 'anthropic' and ANTHROPIC_AVAILABLE:
-            return Anthropic(api_key=api_key)
-        elif provider == 'deepseek' and DEEPSEEK_AVAILABLE:
+        elif provider == 'anthropic' and _check_available(provider):
+            from anthropic import Anthropic
+            return Anthropic(api_key=api_key, http_client=_shared_http_client())
+        elif provider == 'deepseek' and _check_available(provider):
+            from deepseek import DeepSeek
             return DeepSeek(api_key=api_key)
     except Exception as e:
         print(f"Error initializing {provider} client: {e}")
@@ -52,35 +91,55 @@ def initialize_ai_client(provider, api_key):
     
     return None
 
+# Prompt shared by every provider, filled in with str.format_map
+_BASE_PROMPT = (
+    "Task: Generate exactly {target_lines} lines of coherent, natural text in a single language (no more, no less).\n\n"
+    "Rules:\n"
+    "1. Each line MUST be a complete, meaningful sentence in natural language\n"
+    "2. One line MUST contain exactly this phrase: '{highlighted_text}'\n"
+    "3. IMPORTANT: Each line MUST be 50-80 characters long (no short lines)\n"
+    "4. Create a coherent paragraph where all lines relate to each other\n"
+    "5. The text should flow naturally with the highlighted phrase integrated seamlessly\n"
+    "6. Write in a descriptive, engaging style that makes sense to a human reader\n"
+    "7. Every line must be substantial and meaningful, not just filler text\n"
+    "8. Fill all available space with properly formatted lines of text\n\n"
+    "Format:\n"
+    "- Return ONLY the lines of text\n"
+    "- Separate lines with single newlines\n"
+    "- No numbering, no quotes, no extra formatting\n"
+    "- EVERY line must be a complete sentence with proper punctuation\n\n"
+)
+
+_PROVIDER_PREFIXES = {
+    'anthropic': "You are a creative writer. ",
+    'gemini': "You are a text generation expert. ",
+}
+
+_PROVIDER_SUFFIXES = {
+    # Anthropic Claude responds well to more structured prompts
+    'anthropic': (
+        "\nThis text will be used for a video effect, so it's important that:\n"
+        "1. The text reads naturally and coherently\n"
+        "2. All sentences connect logically to each other\n"
+        "3. The highlighted phrase is integrated seamlessly\n"
+        "4. No placeholder text, lorem ipsum, or gibberish is used"
+    ),
+    # Mistral benefits from clear formatting expectations
+    'mistral': "\nPlease generate text that reads naturally. No gibberish, placeholder text, or random characters.",
+}
+
 def create_prompt_for_provider(provider, target_lines, min_lines, highlighted_text):
     """Creates an appropriate prompt for each AI provider."""
-    base_prompt = (
-        f"Task: Generate exactly {target_lines} lines of coherent, natural text in a single language (no more, no less).\n\n"
-        f"Rules:\n"
-        f"1. Each line MUST be a complete, meaningful sentence in natural language\n"
-        f"2. One line MUST contain exactly this phrase: '{highlighted_text}'\n"
-        f"3. IMPORTANT: Each line MUST be 50-80 characters long (no short lines)\n"
-        f"4. Create a coherent paragraph where all lines relate to each other\n"
-        f"5. The text should flow naturally with the highlighted phrase integrated seamlessly\n"
-        f"6. Write in a descriptive, engaging style that makes sense to a human reader\n"
-        f"7. Every line must be substantial and meaningful, not just filler text\n"
-        f"8. Fill all available space with properly formatted lines of text\n\n"
-        f"Format:\n"
-        f"- Return ONLY the lines of text\n"
-        f"- Separate lines with single newlines\n"
-        f"- No numbering, no quotes, no extra formatting\n"
-        f"- EVERY line must be a complete sentence with proper punctuation\n\n"
-    )
+    return _PROVIDER_PREFIXES.get(provider, "") + _BASE_PROMPT.format_map(
+        {'target_lines': target_lines, 'highlighted_text': highlighted_text})
 
-    if provider == 'anthropic':
-        return f"You are a creative writer. {base_prompt}"
-    elif provider == 'gemini':
-        return f"You are a text generation expert. {base_prompt}"
-    else:
-        return base_prompt
+# Separator the model is asked to put between snippets in a batched request
+SNIPPET_SEPARATOR = "===SNIPPET==="
+MAX_BATCH_TOKENS = 4000
 
-def generate_mistral_text(client, model, prompt, highlighted_text):
-    """Generate text using Mistral AI."""
+def request_mistral_completion(client, model, prompt, max_tokens=800):
+    """Request raw text from Mistral AI."""
+    from mistralai import UserMessage, SystemMessage
     messages = [
         SystemMessage(content="You are a text generation assistant that creates natural, coherent text. Follow formatting rules exactly and create meaningful sentences that flow naturally."),
         UserMessage(content=prompt)
@@ -89,56 +148,83 @@ def generate_mistral_text(client, model, prompt, highlighted_text):
         model=model,
         messages=messages,
         temperature=0.7,
-        max_tokens=800
+        max_tokens=max_tokens
     )
-    return process_ai_response(response.choices[0].message.content, highlighted_text)
+    return response.choices[0].message.content
 
-def generate_gemini_text(client, prompt, highlighted_text):
-    """Generate text using Google Gemini."""
+def request_gemini_completion(client, prompt):
+    """Request raw text from Google Gemini."""
     response = client.generate_content(prompt)
-    return process_ai_response(response.text, highlighted_text)
+    return response.text
 
-def generate_anthropic_text(client, prompt, highlighted_text):
-    """Generate text using Anthropic Claude."""
+def request_anthropic_completion(client, prompt, max_tokens=800):
+    """Request raw text from Anthropic Claude."""
     response = client.messages.create(
         model="claude-3-opus-20240229",
-        max_tokens=800,
+        max_tokens=max_tokens,
         temperature=0.7,
         messages=[{"role": "user", "content": prompt}]
     )
-    return process_ai_response(response.content[0].text, highlighted_text)
+    return response.content[0].text
+
+def request_deepseek_completion(client, prompt):
+    """Request raw text from DeepSeek."""
+    return client.generate_text(prompt)
+
+def request_completion(client, provider, model, prompt, max_tokens=800):
+    """Request raw text from the specified AI provider."""
+    if provider == 'mistral':
+        return request_mistral_completion(client, model, prompt, max_tokens)
+    elif provider == 'gemini':
+        return request_gemini_completion(client, prompt)
+    elif provider == 'anthropic':
+        return request_anthropic_completion(client, prompt, max_tokens)
+    elif provider == 'deepseek':
+        return request_deepseek_completion(client, prompt)
+    return None
+
+def generate_mistral_text(client, model, prompt, highlighted_text):
+    """Generate text using Mistral AI."""
+    return process_ai_response(request_mistral_completion(client, model, prompt), highlighted_text)
+
+def generate_gemini_text(client, prompt, highlighted_text):
+    """Generate text using Google Gemini."""
+    return process_ai_response(request_gemini_completion(client, prompt), highlighted_text)
+
+def generate_anthropic_text(client, prompt, highlighted_text):
+    """Generate text using Anthropic Claude."""
+    return process_ai_response(request_anthropic_completion(client, prompt), highlighted_text)
 
 def generate_deepseek_text(client, prompt, highlighted_text):
     """Generate text using DeepSeek."""
-    response = client.generate_text(prompt)
-    return process_ai_response(response, highlighted_text)
+    return process_ai_response(request_deepseek_completion(client, prompt), highlighted_text)
+
+# Content of a non-blank line without its surrounding whitespace
+_LINE_RE = re.compile(r'^[^\S\n]*(\S(?:[^\n]*\S)?)', re.MULTILINE)
+# Lines that look like instructions or headings
+_SKIP_RE = re.compile(r'#|-|\*|Note:|Format:')
+_NUMBERED_RE = re.compile(r'\d\. ')
+# A usable sentence: not a header, code block or separator, 40-100 characters,
+# with a space, some punctuation and at least 5 words
+_VALID_RE = re.compile(r'(?!#|```|---)(?=.{40,100}\Z)(?=.* )(?=.*[.?!])\s*(?:\S+\s+){4}\S')
 
 def process_ai_response(content, highlighted_text):
     """Process AI response and extract lines and highlight index."""
     # Clean up the content by removing any markdown formatting or extra spaces
     cleaned_content = content.replace('```', '').replace('**', '').strip()
     
-    # Split into lines and clean each line
-    lines = [line.strip() for line in cleaned_content.split('\n') if line.strip()]
+    # Pull out the non-blank lines, already stripped, in a single regex scan
+    lines = _LINE_RE.findall(cleaned_content)
     
-    # Filter out any lines that might be instructions or formatting
-    filtered_lines = []
-    for line in lines:
-        # Skip lines that look like instructions or headings
-        if line.startswith('#') or line.startswith('-') or line.startswith('*') or \
-           line.startswith('Note:') or line.startswith('Format:'):
-            continue
-        # Skip numbered lines (like "1. ", "2. ")
-        if len(line) > 2 and line[0].isdigit() and line[1] == '.' and line[2] == ' ':
-            line = line[3:]
-        filtered_lines.append(line)
+    # Filter out any lines that might be instructions or formatting,
+    # and drop the number of numbered lines (like "1. ", "2. ")
+    filtered_lines = [line[3:] if _NUMBERED_RE.match(line) else line
+                      for line in lines if not _SKIP_RE.match(line)]
+    if not filtered_lines:
+        return [], -1  # Only markdown or instructions, nothing to duplicate
     
     # Find highlight line
-    highlight_index = -1
-    for i, line in enumerate(filtered_lines):
-        if highlighted_text in line:
-            highlight_index = i
-            break
+    highlight_index = next((i for i, line in enumerate(filtered_lines) if highlighted_text in line), -1)
     
     # Ensure we have enough lines by duplicating if necessary
     MIN_REQUIRED_LINES = 12  # Ensure we have at least this many lines
@@ -147,25 +233,39 @@ def process_ai_response(content, highlighted_text):
         # Add duplicate lines with small modifications to reach minimum count
         original_line_count = len(filtered_lines)
         
-        for i in range(MIN_REQUIRED_LINES - original_line_count):
-            # Select a line to duplicate (avoiding the highlight line)
-            source_idx = (i % original_line_count)
-            if source_idx == highlight_index and original_line_count > 1:
-                source_idx = (source_idx + 1) % original_line_count
-            
-            source_line = filtered_lines[source_idx]
-            
-            # Make a small modification to the line
-            words = source_line.split()
-            if len(words) > 3:
-                # Change an adjective or swap word order
-                filtered_lines.append(" ".join(words[::-1]).capitalize() + ".")
-            else:
-                # Just append the original if it's too short to modify
-                filtered_lines.append(source_line)
+        # Select the lines to duplicate (avoiding the highlight line)
+        source_idxs = [i % original_line_count for i in range(MIN_REQUIRED_LINES - original_line_count)]
+        if original_line_count > 1:
+            source_idxs = [(idx + 1) % original_line_count if idx == highlight_index else idx
+                           for idx in source_idxs]
+        
+        # Swap the word order of each copy, or keep the original if it's too short to modify
+        extras = [" ".join(reversed(filtered_lines[idx].split())).capitalize() + "."
+                  if len(filtered_lines[idx].split()) > 3 else filtered_lines[idx]
+                  for idx in source_idxs]
+        filtered_lines.extend(extras)
     
     return filtered_lines, highlight_index
 
+def add_provider_instructions(provider, prompt):
+    """Adds more specific instructions based on provider to enhance quality."""
+    return prompt + _PROVIDER_SUFFIXES.get(provider, "")
+
+def validate_snippet(lines, highlight_index, highlighted_text, min_lines):
+    """Keeps only lines meeting minimum quality standards; returns (None, -1) if the snippet is unusable."""
+    if lines and highlight_index != -1:
+        # Check each line for minimum quality standards
+        valid_lines = [line for line in lines if _VALID_RE.match(line)]
+        
+        # If we have valid lines, return them
+        if valid_lines and len(valid_lines) >= min_lines:
+            # Recalculate highlight index in case lines were filtered
+            new_highlight_index = next((i for i, line in enumerate(valid_lines) if highlighted_text in line), -1)
+            
+            if new_highlight_index != -1:
+                return valid_lines, new_highlight_index
+    return None, -1
+
 def generate_ai_text_snippet(client, provider, model, highlighted_text, min_lines, max_lines):
     """Generates text using the specified AI provider with improved reliability."""
     if not client:
@@ -174,22 +274,7 @@ def generate_ai_text_snippet(client, provider, model, highlighted_text, min_line
     # Always request maximum lines to ensure proper screen filling
     target_lines = max_lines
     prompt = create_prompt_for_provider(provider, target_lines, min_lines, highlighted_text)
-
-    # Add more specific instructions based on provider to enhance quality
-    if provider == 'anthropic':
-        # Anthropic Claude responds well to more structured prompts
-        prompt += (
-            "\nThis text will be used for a video effect, so it's important that:\n"
-            "1. The text reads naturally and coherently\n"
-            "2. All sentences connect logically to each other\n"
-            "3. The highlighted phrase is integrated seamlessly\n"
-            "4. No placeholder text, lorem ipsum, or gibberish is used"
-        )
-    elif provider == 'mistral':
-        # Mistral benefits from clear formatting expectations
-        prompt += (
-            "\nPlease generate text that reads naturally. No gibberish, placeholder text, or random characters."
-        )
+    prompt = add_provider_instructions(provider, prompt)
 
     try:
         lines = None
@@ -206,35 +291,9 @@ def generate_ai_text_snippet(client, provider, model, highlighted_text, min_line
             lines, highlight_index = generate_deepseek_text(client, prompt, highlighted_text)
             
         # Validate the generated text
-        if lines and highlight_index != -1:
-            # Check each line for minimum quality standards
-            valid_lines = []
-            for line in lines:
-                # Filter out any non-sentence content, headers, code blocks, etc.
-                if (len(line) >= 40 and  # Stricter minimum length (was 15)
-                    len(line) <= 100 and  # Maximum length
-                    ' ' in line and  # Contains spaces (not just a token)
-                    ('.' in line or '?' in line or '!' in line) and  # Has proper punctuation
-                    not line.startswith('#') and  # Not a markdown header
-                    not line.startswith('```') and  # Not a code block
-                    not line.startswith('---') and  # Not a separator
-                    line.strip() and  # Not just whitespace
-                    len(line.split()) >= 5):  # At least 5 words
-                    
-                    # Add valid line
-                    valid_lines.append(line)
-            
-            # If we have valid lines, return them
-            if valid_lines and len(valid_lines) >= min_lines:
-                # Recalculate highlight index in case lines were filtered
-                new_highlight_index = -1
-                for i, line in enumerate(valid_lines):
-                    if highlighted_text in line:
-                        new_highlight_index = i
-                        break
-                
-                if new_highlight_index != -1:
-                    return valid_lines, new_highlight_index
+        lines, highlight_index = validate_snippet(lines, highlight_index, highlighted_text, min_lines)
+        if lines:
+            return lines, highlight_index
         
         # If we get here, something went wrong with the text generation
         print(f"Warning: Generated text did not meet quality standards with {provider}")
@@ -244,5 +303,47 @@ def generate_ai_text_snippet(client, provider, model, highlighted_text, min_line
         print(f"Error generating text with {provider}: {e}")
         return None, -1
 
+def generate_ai_text_batch(client, provider, model, highlighted_text, min_lines, max_lines, batch_size):
+    """Generates several snippets in a single request instead of one round trip per snippet.
+    Returns the list of valid (lines, highlight_index) snippets, possibly fewer than batch_size."""
+    if not client or batch_size < 1:
+        return []
+
+    target_lines = max_lines
+    prompt = create_prompt_for_provider(provider, target_lines, min_lines, highlighted_text)
+    prompt += (
+        f"Batch:\n"
+        f"- Write {batch_size} different snippets following the rules above, each with its own wording\n"
+        f"- Put a line containing only {SNIPPET_SEPARATOR} between consecutive snippets\n"
+    )
+    prompt = add_provider_instructions(provider, prompt)
+
+    try:
+        content = request_completion(client, provider, model, prompt,
+                                     max_tokens=min(MAX_BATCH_TOKENS, 800 * batch_size))
+        if not content:
+            return []
+
+        snippets = []
+        for part in content.split(SNIPPET_SEPARATOR):
+            if not part.strip():
+                continue
+            # A malformed part only skips itself, not the rest of the batch
+            try:
+                lines, highlight_index = validate_snippet(*process_ai_response(part, highlighted_text),
+                                                          highlighted_text, min_lines)
+            except Exception as e:
+                print(f"Warning: Skipping a malformed batched snippet from {provider}: {e}")
+                continue
+            if lines:
+                snippets.append((lines, highlight_index))
+        if len(snippets) < batch_size:
+            print(f"Warning: Only {len(snippets)}/{batch_size} batched snippets from {provider} met quality standards")
+        return snippets[:batch_size]
+
+    except Exception as e:
+        print(f"Error generating batched text with {provider}: {e}")
+        return []
+
 # Import needed for random number generation inside this module
 import random
@@ -0,0 +1,51 @@
+import functools
+import numpy as np
+
+@functools.lru_cache(maxsize=32)
+def _font_atlas(font):
+    """Per-font cache of rasterized glyphs, filled in as new characters show up."""
+    return {}
+
+def _glyph(atlas, font, char):
+    """Rasterizes a single character with FreeType the first time it is seen in this font.
+    Glyphs are kept as their visible pixels only: (rows and columns from the pen position
+    on the baseline, coverage values, advance)."""
+    glyph = atlas.get(char)
+    if glyph is None:
+        mask, (offset_x, offset_y) = font.getmask2(char, mode="L", anchor="ls")
+        coverage = np.asarray(mask, dtype=np.uint8).reshape(mask.size[1], mask.size[0])
+        ys, xs = np.nonzero(coverage)
+        glyph = (ys + offset_y, xs + offset_x, coverage[ys, xs], font.getlength(char))
+        atlas[char] = glyph
+    return glyph
+
+def getmask(font, text):
+    """Coverage mask of one line of text, like font.getmask2(text, mode="L", anchor="lt"),
+    but blitted from cached glyphs instead of rasterizing the whole line again.
+    Returns (array, (x, y)) with the array's offset from the anchor, or None if nothing is visible."""
+    if not text:
+        return None
+    atlas = _font_atlas(font)
+    glyphs = [_glyph(atlas, font, char) for char in text]
+    advances = [glyph[3] for glyph in glyphs]
+
+    # Kerning and shaping change the advances; let FreeType lay those lines out
+    if sum(advances) != font.getlength(text):
+        mask, offset = font.getmask2(text, mode="L", anchor="lt")
+        if not mask.size[0] or not mask.size[1]:
+            return None
+        return np.asarray(mask, dtype=np.uint8).reshape(mask.size[1], mask.size[0]), offset
+
+    values = np.concatenate([glyph[2] for glyph in glyphs])
+    if not values.size:
+        return None
+    # Pen position of every glyph, rounded to whole pixels like FreeType does
+    pen_xs = np.floor(np.cumsum([0.0] + advances[:-1]) + 0.5).astype(np.intp)
+    ys = np.concatenate([glyph[0] for glyph in glyphs])
+    xs = np.concatenate([glyph[1] for glyph in glyphs]) + np.repeat(pen_xs, [len(glyph[2]) for glyph in glyphs])
+
+    # The "lt" anchor puts the top of the line's ink at y = 0
+    top, left = ys.min(), xs.min()
+    line = np.zeros((ys.max() - top + 1, xs.max() - left + 1), dtype=np.uint8)
+    np.maximum.at(line, (ys - top, xs - left), values)  # Overlapping glyphs keep the strongest coverage
+    return line, (int(left), 0)
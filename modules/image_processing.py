@@ -1,23 +1,107 @@
 import os
 import random
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+import functools
+import threading
+from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import numpy as np
-from modules.textures import create_paper_texture, create_radial_blur_mask, apply_vignette
+from modules.textures import get_background_template, texture_mtime, create_radial_blur_mask
+from modules import glyph_atlas
 
 # Custom Exceptions for font errors
 class FontLoadError(Exception): pass
 class FontDrawError(Exception): pass
 
+# Fonts are reused for every frame of a video, so keep loaded faces around
+_BOLD_PATH_CACHE = {}  # font_path -> list of existing bold variant paths
+_FONT_INDEX_CACHE = {}  # font directory -> {lowercased file name: path}
+_FALLBACK_FONT_CACHE = {}  # family -> matplotlib fallback font path
+
+COMMON_BOLD_SUFFIXES = ["bd.ttf", "-Bold.ttf", "b.ttf", "_Bold.ttf", " Bold.ttf"]
+
+# Paper texture settings used for the frame background
+PAPER_NOISE_INTENSITY = 0.08
+PAPER_GRAIN_SIZE = 2
+
+# Color and opacity (0-255) of the text shadow
+SHADOW_COLOR = '#333333'
+SHADOW_ALPHA = 100
+
+# Final touch-up applied to every frame (same factors as the old ImageEnhance calls)
+FRAME_CONTRAST = 1.1
+FRAME_SHARPNESS = 1.2
+
+# Float working buffers for the touch-up, reused across frames (one pair per thread)
+_POST_BUFFERS = threading.local()
+
+# Bounded because text sizes vary between requests; room for every face _load_font_pair holds
+@functools.lru_cache(maxsize=512)
+def _load_font(font_path, font_size):
+    """Loads a TrueType font, reusing a previously loaded face for the same path and size."""
+    return ImageFont.truetype(font_path, font_size)
+
+@functools.lru_cache(maxsize=256)
+def _load_font_pair(font_path, font_size):
+    """Loads a font and its bold variant (the regular face if none loads), once per path and size."""
+    font = _load_font(font_path, font_size)
+    bold_font = font  # Start with regular as fallback
+    # Simple bold variant check (can be improved)
+    for potential_bold_path in _resolve_bold_paths(font_path):
+        try:
+            bold_font = _load_font(potential_bold_path, font_size)
+            break  # Use the first one found
+        except IOError:
+            continue  # Try next candidate if loading fails
+    return font, bold_font
+
+def _font_index(directory):
+    """Maps the lowercased file names of a font directory to their paths, listing it only once."""
+    index = _FONT_INDEX_CACHE.get(directory)
+    if index is None:
+        try:
+            names = os.listdir(directory or os.curdir)
+        except OSError:
+            names = []
+        index = _FONT_INDEX_CACHE[directory] = {name.lower(): os.path.join(directory, name) for name in names}
+    return index
+
+def _resolve_bold_paths(font_path):
+    """Returns the existing bold variant candidates for a font, looked up in its directory listing."""
+    candidates = _BOLD_PATH_CACHE.get(font_path)
+    if candidates is None:
+        candidates = []
+        font_dir, file_name = os.path.split(font_path)
+        index = _font_index(font_dir)
+        base_name = os.path.splitext(file_name)[0]
+        for suffix in COMMON_BOLD_SUFFIXES:
+            # Try removing 'Regular' too, then check without removing it
+            for potential_bold_name in (base_name.replace("Regular", "").replace("regular", "") + suffix,
+                                        base_name + suffix):
+                potential_bold_path = index.get(potential_bold_name.lower())
+                if potential_bold_path and potential_bold_path not in candidates:
+                    candidates.append(potential_bold_path)
+        _BOLD_PATH_CACHE[font_path] = candidates
+    return candidates
+
+def _find_fallback_font(family='sans-serif'):
+    """Resolves matplotlib's fallback font path once per family."""
+    import matplotlib.font_manager as fm
+
+    if family not in _FALLBACK_FONT_CACHE:
+        prop = fm.FontProperties(family=family)
+        _FALLBACK_FONT_CACHE[family] = fm.findfont(prop, fallback_to_default=True)
+    return _FALLBACK_FONT_CACHE[family]
+
 def get_random_font(font_paths, exclude_list=None):
     """Selects a random font file path from the list, avoiding excluded ones."""
-    import matplotlib.font_manager as fm
-    
-    available_fonts = list(set(font_paths) - set(exclude_list or []))
+    if exclude_list:
+        excluded = set(exclude_list)
+        available_fonts = [path for path in font_paths if path not in excluded]
+    else:
+        available_fonts = font_paths  # Nothing has failed yet (the usual case): no copy needed
     if not available_fonts:
         try:
             # More robust fallback finding sans-serif
-            prop = fm.FontProperties(family='sans-serif')
-            fallback_path = fm.findfont(prop, fallback_to_default=True)
+            fallback_path = _find_fallback_font('sans-serif')
             if fallback_path:
                  print(f"Warning: No usable fonts found from list/system. Using fallback: {fallback_path}")
                  return fallback_path
@@ -30,198 +114,276 @@ def get_random_font(font_paths, exclude_list=None):
             return None
     return random.choice(available_fonts)
 
+@functools.lru_cache(maxsize=16)
+def _text_block_masks(text_lines, font, line_xs, line_height, shadow_offset):
+    """Builds the coverage masks of a whole snippet once (from cached glyphs), for the text and its translucent shadow.
+    Frames showing the same snippet only shift it vertically, so they all reuse these masks.
+    Returns (mask, shadow_mask, left, top), with the masks' offset from the block's 'lt' anchor,
+    or None if no line has visible glyphs."""
+    placed = []
+    for i, (line, line_x) in enumerate(zip(text_lines, line_xs)):
+        line_mask = glyph_atlas.getmask(font, line)
+        if line_mask is not None:
+            coverage, (left, top) = line_mask
+            placed.append((coverage, round(line_x) + left, round(i * line_height) + top))
+    if not placed:
+        return None
+
+    block_left = min(x for _, x, _ in placed)
+    block_top = min(y for _, _, y in placed)
+    block_right = max(x + coverage.shape[1] for coverage, x, _ in placed)
+    block_bottom = max(y + coverage.shape[0] for coverage, _, y in placed)
+    block = np.zeros((block_bottom - block_top, block_right - block_left), dtype=np.uint8)
+    for coverage, x, y in placed:
+        region = block[y - block_top:y - block_top + coverage.shape[0], x - block_left:x - block_left + coverage.shape[1]]
+        np.maximum(region, coverage, out=region)
+    mask = Image.fromarray(block)
+
+    # The shadow is the same coverage, shifted and scaled down to SHADOW_ALPHA
+    shadow_mask = Image.new('L', (mask.width + shadow_offset, mask.height + shadow_offset), 0)
+    shadow_mask.paste(mask.point([v * SHADOW_ALPHA // 255 for v in range(256)]), (shadow_offset, shadow_offset))
+    return mask, shadow_mask, block_left, block_top
+
+# Text measurements repeat across frames (same lines, highlight and font), so they are memoized.
+# Fonts come from _load_font's cache, so the same face is always the same (hashable) object.
+@functools.lru_cache(maxsize=4096)
+def _text_length(font, text):
+    """Cached font.getlength(text)."""
+    return font.getlength(text)
+
+@functools.lru_cache(maxsize=1024)
+def _text_bbox(font, text):
+    """Cached font.getbbox(text, anchor="lt")."""
+    return font.getbbox(text, anchor="lt")
+
+@functools.lru_cache(maxsize=32)
+def _compute_layout(text_lines, highlight_line_index, highlighted_text, font, bold_font, font_size,
+                    width, height, vertical_spread_factor):
+    """Measures a snippet and computes where every line goes.
+    A snippet is shown for several consecutive frames with the same font, so the result is cached."""
+    # Line height using getmetrics()
+    try:
+         ascent, descent = font.getmetrics()
+         metric_height = ascent + abs(descent)
+         line_height = int(metric_height * vertical_spread_factor)
+    except AttributeError:
+         bbox_line_test = _text_bbox(font, "Ay")
+         line_height = int((bbox_line_test[3] - bbox_line_test[1]) * vertical_spread_factor)
+    if line_height <= font_size * 0.8:
+        line_height = int(font_size * 1.2 * vertical_spread_factor)
+
+    # BOLD font metrics for final highlight placement
+    highlight_width_bold = _text_length(bold_font, highlighted_text)
+    highlight_bbox_h = _text_bbox(bold_font, highlighted_text)
+    highlight_height_bold = highlight_bbox_h[3] - highlight_bbox_h[1]
+    if highlight_width_bold <= 0 or highlight_height_bold <= 0:
+         highlight_height_bold = int(font_size * 1.1)
+         if highlight_width_bold <=0: highlight_width_bold = len(highlighted_text) * font_size * 0.6
+
+    # Target position for the TOP-LEFT of the final BOLD highlight text (CENTERED)
+    highlight_target_x = (width - highlight_width_bold) / 2
+    highlight_target_y = (height - highlight_height_bold) / 2
+
+    # Calculate total text block height
+    total_block_height = line_height * len(text_lines)
+    
+    # Adjust vertical positioning to better fill the frame
+    # Center the entire text block in the frame
+    vertical_center_offset = (height - total_block_height) / 2
+    
+    # Block start Y calculated relative to the centered highlight's top, with adjusted centering
+    block_start_y = max(10, vertical_center_offset)  # Ensure there's at least 10px margin at top
+    
+    # Adjust highlight target y to match the new block positioning
+    highlight_target_y = block_start_y + (highlight_line_index * line_height)
+
+    # Get Prefix and Suffix for background alignment
+    highlight_line_full_text = text_lines[highlight_line_index]
+    prefix_text = ""
+    suffix_text = "" # Also get suffix now
+    highlight_found_in_line = False
+    try:
+        start_index = highlight_line_full_text.index(highlighted_text)
+        end_index = start_index + len(highlighted_text)
+        prefix_text = highlight_line_full_text[:start_index]
+        suffix_text = highlight_line_full_text[end_index:]
+        highlight_found_in_line = True
+    except ValueError: pass # Treat line normally if not found
+
+    # Measure Prefix Width using REGULAR font (for background positioning)
+    prefix_width_regular = _text_length(font, prefix_text)
+    # Calculate the required starting X for the background highlight line string
+    # This is the coordinate used for drawing the *full string* in the background
+    bg_highlight_line_start_x = highlight_target_x - prefix_width_regular
+
+    # Horizontal position of every line, computed for all lines at once
+    try:
+        line_widths = np.array([_text_length(font, line) for line in text_lines], dtype=np.float64)
+    except AttributeError:
+        # Fallback for older PIL versions
+        line_widths = np.array([bbox[2] - bbox[0] for bbox in (_text_bbox(font, line) for line in text_lines)],
+                               dtype=np.float64)
+
+    # Center all lines, keeping them within frame boundaries (at least 20px from left edge)
+    line_xs = np.maximum(20, (width - line_widths) / 2)
+    # For short lines (less than 30% of frame width), keep them within a reasonable text column
+    center_column_width = width * 0.7
+    short_lines = line_widths < width * 0.3
+    line_xs[short_lines] = np.maximum(line_xs[short_lines], (width - center_column_width) / 2)
+
+    if highlight_found_in_line:
+        # Use calculated position for highlight line
+        line_xs[highlight_line_index] = bg_highlight_line_start_x
+
+    return {
+        "line_height": line_height,
+        "block_start_y": block_start_y,
+        "line_xs": tuple(line_xs.tolist()),
+        "highlight_target_x": highlight_target_x,
+        "highlight_target_y": highlight_target_y,
+        "highlight_width_bold": highlight_width_bold,
+        "highlight_height_bold": highlight_height_bold,
+    }
+
+def get_frame_background(width, height, bg_color, background_texture=None, media_dir=None, seed=None):
+    """Returns the shared paper texture background for a video; .copy() it before drawing.
+    Processes given the same seed build the same background."""
+    return get_background_template(width, height, bg_color, PAPER_NOISE_INTENSITY, PAPER_GRAIN_SIZE,
+                                   texture_name=background_texture, media_dir=media_dir,
+                                   texture_version=texture_mtime(background_texture, media_dir), seed=seed)
+
+def _post_buffers(height, width):
+    """Returns this thread's pair of float32 frame buffers, reallocated only when the size changes."""
+    buffers = getattr(_POST_BUFFERS, 'buffers', None)
+    if buffers is None or buffers[0].shape[:2] != (height, width):
+        buffers = _POST_BUFFERS.buffers = (np.empty((height, width, 3), np.float32),
+                                           np.empty((height, width, 3), np.float32))
+    return buffers
+
+def _downscaled_blur(img, radius):
+    """Gaussian blur computed on a downscaled copy and scaled back up. A blur this wide leaves
+    no detail the smaller copy would lose, and the blur itself gets up to 16x cheaper."""
+    # Powers of two keep the difference small (about ten gray levels at most, next to edges)
+    factor = 4 if radius >= 6 else 2 if radius >= 3 else 1
+    if factor == 1:
+        return img.filter(ImageFilter.GaussianBlur(radius=radius))
+    width, height = img.size
+    small = img.resize((max(1, round(width / factor)), max(1, round(height / factor))), Image.Resampling.BOX)
+    small = small.filter(ImageFilter.GaussianBlur(radius=radius / factor))
+    return small.resize((width, height), Image.Resampling.BILINEAR)
+
+def enhance_frame(img, contrast, sharpness, out=None):
+    """NumPy equivalent of ImageEnhance.Contrast followed by ImageEnhance.Sharpness.
+    Works in place on two reused buffers instead of allocating four intermediate images; returns RGB.
+    If out (a uint8 height x width x 3 array) is given, the result is written into it and out itself
+    is returned: wrapping it in a PIL image would copy every pixel again (Pillow stores RGB padded)."""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    width, height = img.size
+    buf_a, buf_b = _post_buffers(height, width)
+
+    # Contrast: blend away from the mean gray level of the image. The mean comes from the
+    # per-channel histograms, and being a per-value mapping the blend is a 256-entry table
+    # applied by Pillow on the uint8 frame; both are much cheaper than NumPy passes over it.
+    channel_means = np.array(img.histogram(), dtype=np.float64).reshape(3, 256) @ np.arange(256) / (width * height)
+    mean = int(np.dot(channel_means, (0.299, 0.587, 0.114)) + 0.5)
+    contrast_lut = np.clip(mean + contrast * (np.arange(256) - mean), 0, 255).astype(np.uint8)
+    np.copyto(buf_a, np.asarray(img.point(np.tile(contrast_lut, 3).tolist())))
+
+    # Sharpness: blend away from the SMOOTH filter (3x3 kernel, center weight 5, total 13).
+    # Edge pixels are left as they are, like Pillow's filter does.
+    inner = buf_b[1:-1, 1:-1]
+    np.multiply(buf_a[1:-1, 1:-1], 5, out=inner)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy != 1 or dx != 1:
+                inner += buf_a[dy:height - 2 + dy, dx:width - 2 + dx]
+    inner *= (1 - sharpness) / 13
+    buf_b[0] = buf_a[0]
+    buf_b[-1] = buf_a[-1]
+    buf_b[:, 0] = buf_a[:, 0]
+    buf_b[:, -1] = buf_a[:, -1]
+    buf_a[1:-1, 1:-1] *= sharpness
+    inner += buf_a[1:-1, 1:-1]
+    np.clip(buf_b, 0, 255, out=buf_b)
+
+    if out is not None:
+        np.copyto(out, buf_b, casting='unsafe')
+        return out
+    return Image.fromarray(buf_b.astype(np.uint8))
+
 def create_text_image_frame(width, height, text_lines, highlight_line_index, highlighted_text,
                             font_path, font_size, text_color, bg_color, highlight_color,
                             blur_type, blur_radius, radial_sharp_radius_factor, vertical_spread_factor,
-                            y_offset=0, background_texture=None, media_dir=None):
+                            y_offset=0, background_texture=None, media_dir=None, background=None, out=None):
     """Creates a single frame image with centered highlight and multi-line text.
-    Ensures that text fills the entire frame appropriately with proper spacing."""
+    Ensures that text fills the entire frame appropriately with proper spacing.
+    Pass out (a uint8 height x width x 3 array) to render the final pixels into a reused buffer;
+    out is then returned instead of an image."""
     """Creates a single frame image with centered highlight and multi-line text."""
     
-    # Create paper texture background with optional predefined texture
-    img_base = create_paper_texture(width, height, bg_color, noise_intensity=0.08, grain_size=2, 
-                                   texture_name=background_texture, media_dir=media_dir)
-    
-    # If texture loading failed, create default background
-    if img_base is None:
-        print(f"Falling back to default background color: {bg_color}")
-        img_base = create_paper_texture(width, height, bg_color, noise_intensity=0.08, grain_size=2)
+    # Paper texture background with optional predefined texture, built once per video settings
+    # (callers rendering in other processes pass the template in so every frame shares it)
+    if background is None:
+        background = get_frame_background(width, height, bg_color, background_texture, media_dir)
+    img_base = background.copy()
     
-    draw_base = ImageDraw.Draw(img_base)
-
-    # Add subtle text shadow
-    def draw_text_with_shadow(draw, pos_x, pos_y, text, font, color, shadow_color='#333333'):
-        # Draw shadow
-        shadow_offset = max(1, int(font_size * 0.02))
-        draw.text((pos_x + shadow_offset, pos_y + shadow_offset), text, 
-                 font=font, fill=shadow_color, anchor="lt", alpha=100)
-        # Draw main text
-        draw.text((pos_x, pos_y), text, font=font, fill=color, anchor="lt")
 
     # --- Font Loading ---
     try:
-        font = ImageFont.truetype(font_path, font_size)
-        bold_font = font  # Start with regular as fallback
-        # Simple bold variant check (can be improved)
-        common_bold_suffixes = ["bd.ttf", "-Bold.ttf", "b.ttf", "_Bold.ttf", " Bold.ttf"]
-        base_name, ext = os.path.splitext(font_path)
-        for suffix in common_bold_suffixes:
-            potential_bold_path = base_name.replace("Regular", "").replace("regular",
-                                                                           "") + suffix  # Try removing 'Regular' too
-            if os.path.exists(potential_bold_path):
-                try:
-                    bold_font = ImageFont.truetype(potential_bold_path, font_size)
-                    break  # Use the first one found
-                except IOError:
-                    continue  # Try next suffix if loading fails
-            # Check without removing Regular if first checks failed
-            potential_bold_path = base_name + suffix
-            if os.path.exists(potential_bold_path):
-                try:
-                    bold_font = ImageFont.truetype(potential_bold_path, font_size)
-                    break
-                except IOError:
-                    continue
-
+        font, bold_font = _load_font_pair(font_path, font_size)
     except IOError as e:
         raise FontLoadError(f"Failed to load font: {font_path}") from e
     except Exception as e:  # Catch other potential font loading issues
         raise FontLoadError(f"Unexpected error loading font {font_path}: {e}") from e
 
-    # --- Calculations ---
+    # --- Calculations (cached per snippet and font) ---
     try:
-        # Line height using getmetrics()
-        try:
-             ascent, descent = font.getmetrics()
-             metric_height = ascent + abs(descent)
-             line_height = int(metric_height * vertical_spread_factor)
-        except AttributeError:
-             bbox_line_test = font.getbbox("Ay", anchor="lt")
-             line_height = int((bbox_line_test[3] - bbox_line_test[1]) * vertical_spread_factor)
-        if line_height <= font_size * 0.8:
-            line_height = int(font_size * 1.2 * vertical_spread_factor)
-
-        # BOLD font metrics for final highlight placement
-        highlight_width_bold = bold_font.getlength(highlighted_text)
-        highlight_bbox_h = bold_font.getbbox(highlighted_text, anchor="lt")
-        highlight_height_bold = highlight_bbox_h[3] - highlight_bbox_h[1]
-        if highlight_width_bold <= 0 or highlight_height_bold <= 0:
-             highlight_height_bold = int(font_size * 1.1)
-             if highlight_width_bold <=0: highlight_width_bold = len(highlighted_text) * font_size * 0.6
-
-        # Target position for the TOP-LEFT of the final BOLD highlight text (CENTERED)
-        highlight_target_x = (width - highlight_width_bold) / 2
-        highlight_target_y = (height - highlight_height_bold) / 2
-
-        # Calculate total text block height
-        total_block_height = line_height * len(text_lines)
-        
-        # Adjust vertical positioning to better fill the frame
-        # Center the entire text block in the frame
-        vertical_center_offset = (height - total_block_height) / 2
-        
-        # Block start Y calculated relative to the centered highlight's top, with adjusted centering
-        block_start_y = max(10, vertical_center_offset)  # Ensure there's at least 10px margin at top
-        
-        # Adjust highlight target y to match the new block positioning
-        highlight_target_y = block_start_y + (highlight_line_index * line_height)
-
-        # Get Prefix and Suffix for background alignment
-        highlight_line_full_text = text_lines[highlight_line_index]
-        prefix_text = ""
-        suffix_text = "" # Also get suffix now
-        highlight_found_in_line = False
-        try:
-            start_index = highlight_line_full_text.index(highlighted_text)
-            end_index = start_index + len(highlighted_text)
-            prefix_text = highlight_line_full_text[:start_index]
-            suffix_text = highlight_line_full_text[end_index:]
-            highlight_found_in_line = True
-        except ValueError: pass # Treat line normally if not found
-
-        # Measure Prefix Width using REGULAR font (for background positioning)
-        prefix_width_regular = font.getlength(prefix_text)
-        # Calculate the required starting X for the background highlight line string
-        # This is the coordinate used for drawing the *full string* in the background
-        bg_highlight_line_start_x = highlight_target_x - prefix_width_regular
+        layout = _compute_layout(tuple(text_lines), highlight_line_index, highlighted_text, font, bold_font,
+                                 font_size, width, height, vertical_spread_factor)
+        line_height = layout["line_height"]
+        highlight_target_x = layout["highlight_target_x"]
+        highlight_target_y = layout["highlight_target_y"]
+        highlight_width_bold = layout["highlight_width_bold"]
+        highlight_height_bold = layout["highlight_height_bold"]
 
     except AttributeError: raise FontDrawError(f"Font lacks methods.")
     except Exception as e: raise FontDrawError(f"Measurement fail: {e}") from e
 
     # --- Base Image Drawing (Draw FULL lines, use offset for HL line) ---
     try:
-        # Create a copy of the base image for the sharp center
-        img_sharp = img_base.copy()
-        draw_sharp = ImageDraw.Draw(img_sharp)
-
-        # Draw text on both base and sharp images
-        current_y = block_start_y + y_offset
-        for i, line in enumerate(text_lines):
-            line_x = 0.0
-            if i == highlight_line_index and highlight_found_in_line:
-                # Use calculated position for highlight line
-                line_x = bg_highlight_line_start_x
-            else:
-                # Center all other lines
-                try:
-                    line_width = font.getlength(line)
-                except AttributeError:
-                    # Fallback for older PIL versions
-                    bbox = font.getbbox(line, anchor="lt")
-                    line_width = bbox[2] - bbox[0]
-                
-                # Ensure the line is within frame boundaries
-                line_x = max(20, (width - line_width) / 2)  # At least 20px from left edge
-                
-                # For short lines, ensure they don't go too far to the edge
-                if line_width < width * 0.3:  # If line is less than 30% of frame width
-                    # Adjust to keep within a reasonable text column
-                    center_column_width = width * 0.7
-                    line_x = max(line_x, (width - center_column_width) / 2)
-            
-            # Draw text with shadow on both images
-            draw_text_with_shadow(draw_base, line_x, current_y, line, font, text_color)
-            draw_text_with_shadow(draw_sharp, line_x, current_y, line, font, text_color)
-            current_y += line_height
+        # Draw text with a subtle shadow; the base image doubles as the sharp center for radial blur
+        shadow_offset = max(1, int(font_size * 0.02))
+        block = _text_block_masks(tuple(text_lines), font, layout["line_xs"], line_height, shadow_offset)
+        if block is not None:
+            mask, shadow_mask, left, top = block
+            y = round(layout["block_start_y"] + y_offset) + top
+            img_base.paste(SHADOW_COLOR, (left, y), shadow_mask)
+            img_base.paste(text_color, (left, y), mask)
 
     except Exception as e:
         raise FontDrawError(f"Base draw fail: {e}") from e
 
-    # Apply a subtle vignette effect to both images
-    img_base = apply_vignette(img_base)
-    img_sharp = apply_vignette(img_sharp)
-
-    # --- Apply Blur (with padding for Gaussian to avoid edge clipping) ---
+    # --- Apply Blur ---
     img_blurred = None # Initialize
-    padding_for_blur = int(blur_radius * 3) # Padding based on blur radius
 
     if blur_type == 'gaussian' and blur_radius > 0:
-        try:
-            # Create larger canvas
-            padded_width = width + 2 * padding_for_blur
-            padded_height = height + 2 * padding_for_blur
-            img_padded = Image.new('RGB', (padded_width, padded_height), color=bg_color)
-            # Paste original centered onto padded canvas
-            img_padded.paste(img_base, (padding_for_blur, padding_for_blur))
-            # Blur the padded image
-            img_padded_blurred = img_padded.filter(ImageFilter.GaussianBlur(radius=blur_radius))
-            # Crop the center back to original size
-            img_blurred = img_padded_blurred.crop((padding_for_blur, padding_for_blur,
-                                                  padding_for_blur + width, padding_for_blur + height))
-        except Exception as e:
-            print(f"Error during padded Gaussian blur: {e}. Falling back to direct blur.")
-            img_blurred = img_base.filter(ImageFilter.GaussianBlur(radius=blur_radius)) # Fallback
+        # Pillow's Gaussian blur extends the edge pixels, so no padded canvas is needed
+        # to avoid edge clipping
+        img_blurred = img_base.filter(ImageFilter.GaussianBlur(radius=blur_radius))
 
     elif blur_type == 'radial' and blur_radius > 0:
-        # For radial blur, use the textured sharp image
-        img_fully_blurred = img_base.filter(ImageFilter.GaussianBlur(radius=blur_radius * 1.5))
+        # For radial blur, keep the unblurred image in the center
+        img_fully_blurred = _downscaled_blur(img_base, blur_radius * 1.5)
         sharp_center_radius = min(width, height) * radial_sharp_radius_factor
         fade_radius = sharp_center_radius + max(width, height) * 0.15
         mask = create_radial_blur_mask(width, height, width / 2, height / 2, sharp_center_radius, fade_radius)
-        img_blurred = Image.composite(img_sharp, img_fully_blurred, mask)
+        # Paste the sharp center over the blurred copy in place instead of compositing into a new image
+        img_fully_blurred.paste(img_base, (0, 0), mask)
+        img_blurred = img_fully_blurred
 
     else: # No blur
-        img_blurred = img_base.copy()
+        img_blurred = img_base
 
     # --- Final Image: Draw ONLY Highlight Rectangle & Centered BOLD Text ---
     final_img = img_blurred # Start with the blurred/composited image
@@ -249,12 +411,5 @@ def create_text_image_frame(width, height, text_lines, highlight_line_index, hig
     except Exception as e:
          raise FontDrawError(f"Failed final highlight draw: {e}") from e
 
-    # Enhance contrast slightly
-    enhancer = ImageEnhance.Contrast(final_img)
-    final_img = enhancer.enhance(1.1)
-    
-    # Enhance sharpness slightly
-    enhancer = ImageEnhance.Sharpness(final_img)
-    final_img = enhancer.enhance(1.2)
-
-    return final_img
+    # Enhance contrast and sharpness slightly
+    return enhance_frame(final_img, FRAME_CONTRAST, FRAME_SHARPNESS, out=out)
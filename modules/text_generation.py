@@ -1,5 +1,10 @@
+import re
 import random
 import string
+import functools
+
+# Number of pre-generated variants kept per highlighted text for the random generator
+SNIPPET_VARIANTS = 32
 
 # Common words to use in fallback text generation for more natural sentences
 COMMON_WORDS = [
@@ -25,106 +30,143 @@ COMMON_WORDS = [
     "group", "problem", "number", "company", "business", "idea", "information",
 ]
 
+# Sentence structures with placeholders, longer ones to ensure longer sentences
+_SENTENCE_STRUCTURES = (
+    # Basic structures (extended)
+    "The {adj} {noun} {verb} {adv} {prep} the {adj} {noun} {prep} {det} {noun}.",
+    "{det} {adj} {noun} {verb} {det} {adj} {noun} {prep} {det} {adj} {noun}.",
+    "{pronoun} {adv} {verb} that {det} {noun} {verb} {adv} {prep} {det} {noun}.",
+    
+    # Complex structures
+    "When {det} {adj} {noun} {verb} {adv}, {det} {adj} {noun} {verb} {prep} {det} {noun}.",
+    "If {pronoun} {verb} {det} {adj} {noun}, {pronoun} will {verb} {det} {adj} {noun} {adv}.",
+    "{det} {adj} {noun} {verb} to {verb} {prep} {det} {adj} {noun} {prep} {det} {noun}.",
+    
+    # Compound sentences
+    "{det} {noun} {verb} {adv}, but {det} {adj} {noun} {verb} {prep} {det} {adj} {noun}.",
+    "Although {det} {noun} {verb} {adv}, {det} {adj} {noun} {verb} {prep} {det} {adj} {noun}.",
+    "Not only {verb} {det} {adj} {noun} {adv}, but it also {verb} {prep} {det} {adj} {noun}.",
+    
+    # Descriptive sentences
+    "During {det} {adj} {noun}, {det} {adj} {noun} {verb} {adv} {prep} {det} {noun}.",
+    "{det} {adj} {noun} {verb} {adv} because {det} {adj} {noun} {verb} {prep} {det} {noun}.",
+    "{det} {noun} that {verb} {prep} {det} {adj} {noun} {adv} {verb} {det} {adj} {noun}.",
+    
+    # Question structures
+    "Why {verb} {det} {adj} {noun} {adv} {prep} {det} {adj} {noun} {prep} {det} {noun}?",
+    "How {adv} {verb} {det} {adj} {noun} {prep} {det} {adj} {noun} {prep} {det} {noun}?",
+)
+
 def generate_sentence_structure():
     """Generate a plausible sentence structure with placeholders."""
-    # More complex sentence structures with more words to ensure longer sentences
-    structures = [
-        # Basic structures (extended)
-        "The {adj} {noun} {verb} {adv} {prep} the {adj} {noun}.",
-        "{det} {adj} {noun} {verb} {det} {adj} {noun} {prep} {det} {adj} {noun}.",
-        "{pronoun} {adv} {verb} that {det} {noun} {verb} {adv} {prep} {det} {noun}.",
-        
-        # Complex structures
-        "When {det} {adj} {noun} {verb} {adv}, {det} {adj} {noun} {verb} {prep} {det} {noun}.",
-        "If {pronoun} {verb} {det} {adj} {noun}, {pronoun} will {verb} {det} {adj} {noun} {adv}.",
-        "{det} {adj} {noun} {verb} to {verb} {prep} {det} {adj} {noun} {prep} {det} {noun}.",
-        
-        # Compound sentences
-        "{det} {noun} {verb} {adv}, but {det} {adj} {noun} {verb} {prep} {det} {adj} {noun}.",
-        "Although {det} {noun} {verb} {adv}, {det} {adj} {noun} {verb} {prep} {det} {adj} {noun}.",
-        "Not only {verb} {det} {adj} {noun} {adv}, but it also {verb} {prep} {det} {adj} {noun}.",
-        
-        # Descriptive sentences
-        "During {det} {adj} {noun}, {det} {adj} {noun} {verb} {adv} {prep} {det} {noun}.",
-        "{det} {adj} {noun} {verb} {adv} because {det} {adj} {noun} {verb} {prep} {det} {noun}.",
-        "{det} {noun} that {verb} {prep} {det} {adj} {noun} {adv} {verb} {det} {adj} {noun}.",
-        
-        # Question structures
-        "Why {verb} {det} {adj} {noun} {adv} {prep} {det} {adj} {noun}?",
-        "How {adv} {verb} {det} {adj} {noun} {prep} {det} {adj} {noun}?",
-    ]
-    return random.choice(structures)
+    return random.choice(_LONG_STRUCTURES)
+
+# Expanded word lists for more variety and longer sentences
+_WORD_PARTS = {
+    'noun': ("time", "person", "year", "way", "day", "thing", "world", "life", 
+            "hand", "part", "child", "eye", "place", "work", "week", "case",
+            "company", "system", "program", "question", "government", "number",
+            "night", "point", "home", "water", "room", "mother", "area", "money",
+            "story", "fact", "month", "lot", "right", "study", "book", "word", "business"),
+    'verb': ("is", "are", "was", "were", "be", "been", "being", "have", "has", 
+            "had", "do", "does", "did", "done", "make", "makes", "made",
+            "know", "thinks", "takes", "goes", "comes", "uses", "finds", "gives",
+            "tells", "works", "likes", "needs", "feels", "becomes", "leaves",
+            "puts", "means", "keeps", "lets", "begins", "seems", "helps", "shows", "plays"),
+    'adj': ("good", "new", "first", "last", "long", "great", "little", "own", 
+           "other", "old", "right", "big", "high", "different", "small", "large",
+           "early", "young", "important", "few", "public", "same", "able",
+           "best", "better", "low", "certain", "special", "hard", "major", "personal",
+           "current", "national", "natural", "physical", "strong", "possible", "clear"),
+    'adv': ("quickly", "slowly", "carefully", "happily", "sadly", "really", 
+           "very", "extremely", "quite", "rather", "almost", "nearly", "too",
+           "also", "then", "however", "again", "still", "sometimes", "often",
+           "usually", "always", "never", "ever", "perhaps", "especially", 
+           "actually", "clearly", "certainly", "absolutely", "completely"),
+    'prep': ("in", "on", "with", "at", "by", "for", "from", "to", "of", "about",
+           "between", "among", "through", "without", "before", "after",
+           "during", "around", "beyond", "under", "over", "into", "against",
+           "despite", "throughout", "within", "along", "upon", "beside"),
+    'pronoun': ("I", "you", "he", "she", "it", "we", "they", "me", "him", "her",
+               "us", "them", "my", "your", "his", "her", "its", "our", "their",
+               "mine", "yours", "hers", "ours", "theirs", "myself", "yourself",
+               "himself", "herself", "itself", "ourselves", "themselves"),
+    'det': ("the", "a", "an", "this", "that", "these", "those", "my", "your", "his",
+           "her", "its", "our", "their", "some", "any", "each", "every", "many", "much",
+           "few", "several", "all", "both", "either", "neither", "no", "another")
+}
+
+# Placeholders filled in by fill_sentence_structure, e.g. {noun}
+_PLACEHOLDER_RE = re.compile(r'\{(' + '|'.join(_WORD_PARTS) + r')\}')
+
+def _expected_length(structure):
+    """Average length of a filled structure, from the average word length of each category."""
+    return len(_PLACEHOLDER_RE.sub('', structure)) + sum(
+        sum(map(len, _WORD_PARTS[category])) / len(_WORD_PARTS[category])
+        for category in _PLACEHOLDER_RE.findall(structure))
+
+# Structures that come out at least 50 characters long with almost any words (with some margin),
+# so filled sentences don't need to be padded afterwards
+_LONG_STRUCTURES = tuple(structure for structure in _SENTENCE_STRUCTURES if _expected_length(structure) >= 60)
+
+@functools.lru_cache(maxsize=256)
+def _split_structure(structure):
+    """Splits a structure once into its leading text and (category, words, following text) slots.
+    Bounded because the highlighted-line structures embed the user's text."""
+    pieces = _PLACEHOLDER_RE.split(structure)
+    return pieces[0], tuple((category, _WORD_PARTS[category], literal)
+                            for category, literal in zip(pieces[1::2], pieces[2::2]))
 
 def fill_sentence_structure(structure, special_word=None, special_word_pos=None):
     """Fill in a sentence structure with words."""
-    # Expanded word lists for more variety and longer sentences
-    parts = {
-        'noun': ["time", "person", "year", "way", "day", "thing", "world", "life", 
-                "hand", "part", "child", "eye", "place", "work", "week", "case",
-                "company", "system", "program", "question", "government", "number",
-                "night", "point", "home", "water", "room", "mother", "area", "money",
-                "story", "fact", "month", "lot", "right", "study", "book", "word", "business"],
-        'verb': ["is", "are", "was", "were", "be", "been", "being", "have", "has", 
-                "had", "do", "does", "did", "done", "make", "makes", "made",
-                "know", "thinks", "takes", "goes", "comes", "uses", "finds", "gives",
-                "tells", "works", "likes", "needs", "feels", "becomes", "leaves",
-                "puts", "means", "keeps", "lets", "begins", "seems", "helps", "shows", "plays"],
-        'adj': ["good", "new", "first", "last", "long", "great", "little", "own", 
-               "other", "old", "right", "big", "high", "different", "small", "large",
-               "early", "young", "important", "few", "public", "same", "able",
-               "best", "better", "low", "certain", "special", "hard", "major", "personal",
-               "current", "national", "natural", "physical", "strong", "possible", "clear"],
-        'adv': ["quickly", "slowly", "carefully", "happily", "sadly", "really", 
-               "very", "extremely", "quite", "rather", "almost", "nearly", "too",
-               "also", "then", "however", "again", "still", "sometimes", "often",
-               "usually", "always", "never", "ever", "perhaps", "especially", 
-               "actually", "clearly", "certainly", "absolutely", "completely"],
-        'prep': ["in", "on", "with", "at", "by", "for", "from", "to", "of", "about",
-               "between", "among", "through", "without", "before", "after",
-               "during", "around", "beyond", "under", "over", "into", "against",
-               "despite", "throughout", "within", "along", "upon", "beside"],
-        'pronoun': ["I", "you", "he", "she", "it", "we", "they", "me", "him", "her",
-                   "us", "them", "my", "your", "his", "her", "its", "our", "their",
-                   "mine", "yours", "hers", "ours", "theirs", "myself", "yourself",
-                   "himself", "herself", "itself", "ourselves", "themselves"],
-        'det': ["the", "a", "an", "this", "that", "these", "those", "my", "your", "his",
-               "her", "its", "our", "their", "some", "any", "each", "every", "many", "much",
-               "few", "several", "all", "both", "either", "neither", "no", "another"]
-    }
-    
-    result = structure
-    
-    # Replace placeholders with random words from appropriate categories
-    for category in parts:
-        while '{'+category+'}' in result:
-            word = random.choice(parts[category])
-            if special_word and special_word_pos == category:
-                word = special_word
-                special_word = None  # Only use once
-            result = result.replace('{'+category+'}', word, 1)
-    
-    # Ensure sentence is long enough
-    while len(result) < 50:
-        # Add extra descriptors to make sentence longer
-        if " the " in result:
-            adj = random.choice(parts['adj'])
-            result = result.replace(" the ", f" the {adj} ", 1)
-        elif " a " in result:
-            adj = random.choice(parts['adj'])
-            result = result.replace(" a ", f" a {adj} ", 1)
-        else:
-            # If no articles to expand, add suffix
-            if result.endswith('.'):
-                result = result[:-1] + " " + random.choice(["indeed", "for sure", "without doubt", "as expected", "interestingly"]) + "."
-            break
+    head, slots = _split_structure(structure)
+    # The special word takes the first placeholder of its category
+    special_slot = next((i for i, (category, _, _) in enumerate(slots) if category == special_word_pos), -1) \
+        if special_word else -1
+
+    # Pick every word with a single random() draw, indexing the word tuples directly
+    rand = random.random
+    result = head + ''.join([(special_word if i == special_slot else words[int(rand() * len(words))]) + literal
+                             for i, (category, words, literal) in enumerate(slots)])
     
     return result
 
-def generate_random_text_snippet(highlighted_text, min_lines, max_lines, fallback_char_set=None):
-    """Generates multiple lines of readable text with a highlighted phrase."""
+@functools.lru_cache(maxsize=64)
+def _snippet_variants(highlighted_text, min_lines, max_lines):
+    """Pre-generates a pool of snippets for one highlighted text, cached across videos."""
+    variants = (_build_random_text_snippet(highlighted_text, min_lines, max_lines) for _ in range(SNIPPET_VARIANTS))
+    return tuple((tuple(lines), hl_index) for lines, hl_index in variants if lines and hl_index != -1)
+
+def generate_random_text_snippet(highlighted_text, min_lines, max_lines, fallback_char_set=None, use_cache=True):
+    """Generates multiple lines of readable text with a highlighted phrase.
+    By default picks one of the cached variants for this text; use_cache=False builds a fresh one."""
+    if not use_cache:
+        return _build_random_text_snippet(highlighted_text, min_lines, max_lines)
+    variants = _snippet_variants(str(highlighted_text), int(min_lines), int(max_lines))
+    if not variants:
+        return None, -1
+    lines, hl_index = random.choice(variants)
+    return list(lines), hl_index
+
+def generate_random_text_snippets(highlighted_text, min_lines, max_lines, count):
+    """Returns up to count different snippets for one video: cached variants drawn without
+    replacement, then freshly built ones if the video needs more than there are variants."""
+    variants = _snippet_variants(str(highlighted_text), int(min_lines), int(max_lines))
+    snippets = [(list(lines), hl_index) for lines, hl_index in random.sample(variants, min(count, len(variants)))]
+    while len(snippets) < count:
+        lines, hl_index = _build_random_text_snippet(highlighted_text, min_lines, max_lines)
+        if not lines or hl_index == -1:
+            break
+        snippets.append((lines, hl_index))
+    return snippets
+
+def _build_random_text_snippet(highlighted_text, min_lines, max_lines):
+    """Builds one random snippet (list of lines, highlighted line index)."""
     # Ensure we generate at least min_lines
     num_lines = random.randint(max(1, min_lines), max(min_lines, max_lines))
     highlight_line_index = random.randint(0, num_lines - 1)
+    # Draw the first structure of every line at once; retries still pick their own
+    line_structures = random.choices(_LONG_STRUCTURES, k=num_lines)
     lines = []
     
     # Ensure all lines are substantial length
@@ -152,8 +194,7 @@ def generate_random_text_snippet(highlighted_text, min_lines, max_lines, fallbac
                 # If it's a single word, incorporate as the appropriate part of speech
                 pos_options = ['noun', 'verb', 'adj']
                 special_pos = random.choice(pos_options)
-                sentence = fill_sentence_structure(generate_sentence_structure(), 
-                                                  highlighted_text, special_pos)
+                sentence = fill_sentence_structure(line_structures[i], highlighted_text, special_pos)
             
             # Ensure line is long enough
             attempts = 0
@@ -171,7 +212,7 @@ def generate_random_text_snippet(highlighted_text, min_lines, max_lines, fallbac
             lines.append(sentence)
         else:
             # Generate a normal sentence for non-highlighted lines
-            sentence = fill_sentence_structure(generate_sentence_structure())
+            sentence = fill_sentence_structure(line_structures[i])
             
             # Ensure line is long enough
             attempts = 0
@@ -187,12 +228,9 @@ def generate_random_text_snippet(highlighted_text, min_lines, max_lines, fallbac
     for line in lines:
         # Cut excessively long lines
         if len(line) > MAX_LINE_LENGTH:
-            # Try to find a good place to cut the sentence
-            cut_point = MAX_LINE_LENGTH
-            while cut_point > 0 and line[cut_point] != ' ':
-                cut_point -= 1
-            
-            if cut_point > MIN_LINE_LENGTH:
+            # Try to find a good place to cut the sentence: the last space that keeps it long enough
+            cut_point = line.rfind(' ', MIN_LINE_LENGTH + 1, MAX_LINE_LENGTH + 1)
+            if cut_point != -1:
                 line = line[:cut_point] + "."
         
         # Extend short lines
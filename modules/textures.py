@@ -1,21 +1,43 @@
 import os
-import random
-from PIL import Image, ImageDraw, ImageFilter, ImageEnhance
+import math
+import functools
+import numpy as np
+from PIL import Image, ImageColor, ImageEnhance
 
-def create_paper_texture(width, height, color="white", noise_intensity=0.1, grain_size=1, texture_name=None, media_dir=None):
-    """Creates a paper-like texture with subtle noise and grain or uses a predefined texture."""
-    import numpy as np
-    
+# Filter used to scale textures to the frame size; BICUBIC is a bit faster than the default LANCZOS
+TEXTURE_RESAMPLING = getattr(Image.Resampling, os.environ.get('PILLOW_RESAMPLING_FILTER', 'LANCZOS').upper(),
+                             Image.Resampling.LANCZOS)
+
+# Shared generator on the SFC64 bit generator, the cheapest one NumPy ships; the noise only needs to look random
+_rng = np.random.Generator(np.random.SFC64())
+
+def _texture_path(texture_name, media_dir):
+    """Path of a texture file: custom textures and names with an extension are used as they are,
+    predefined ones are .jpg files."""
+    # Check if it's a custom texture or already has extension
+    if texture_name.startswith('custom_texture_') or '.' in texture_name:
+        return os.path.join(media_dir, texture_name)
+    return os.path.join(media_dir, f'{texture_name}.jpg')
+
+def texture_mtime(texture_name, media_dir):
+    """Modification time of a texture file (None without a texture or if it is missing).
+    Part of the background cache key, so a texture replaced on disk is loaded again."""
+    if not texture_name or texture_name == "none" or not media_dir:
+        return None
+    try:
+        return os.stat(_texture_path(texture_name, media_dir)).st_mtime_ns
+    except OSError:
+        return None
+
+def create_paper_texture(width, height, color="white", noise_intensity=0.1, grain_size=1, texture_name=None, media_dir=None,
+                         seed=None):
+    """Creates a paper-like texture with subtle noise and grain or uses a predefined texture.
+    With a seed, the same noise and grain come out in every process."""
     if texture_name and texture_name != "none" and media_dir:
         try:
             print(f"Attempting to load texture: {texture_name}")
             
-            # Check if it's a custom texture or already has extension
-            if texture_name.startswith('custom_texture_') or '.' in texture_name:
-                texture_path = os.path.join(media_dir, texture_name)
-            else:
-                texture_path = os.path.join(media_dir, f'{texture_name}.jpg')
-                
+            texture_path = _texture_path(texture_name, media_dir)
             abs_texture_path = os.path.abspath(texture_path)
             print(f"Full texture path: {abs_texture_path}")
             
@@ -25,6 +47,9 @@ def create_paper_texture(width, height, color="white", noise_intensity=0.1, grai
             
             # Load the texture and convert to RGB
             with Image.open(texture_path) as img:
+                # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding, as long as the
+                # image stays at least twice the frame size (no-op for other formats)
+                img.draft('RGB', (width * 2, height * 2))
                 # Convert to RGB and ensure correct orientation
                 texture = img.convert('RGB')
                 
@@ -36,12 +61,13 @@ def create_paper_texture(width, height, color="white", noise_intensity=0.1, grai
                 scale_h = height / orig_height
                 scale = max(scale_w, scale_h)  # Use the larger scale to cover the entire area
                 
-                # Calculate new dimensions that maintain aspect ratio
-                new_width = int(orig_width * scale)
-                new_height = int(orig_height * scale)
+                # Calculate new dimensions that maintain aspect ratio, rounded up so they never
+                # fall a pixel short of the frame (the crop below then always gives the exact size)
+                new_width = max(width, math.ceil(orig_width * scale))
+                new_height = max(height, math.ceil(orig_height * scale))
                 
                 # Resize maintaining aspect ratio
-                texture = texture.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                texture = texture.resize((new_width, new_height), TEXTURE_RESAMPLING)
                 
                 # If the resized image is larger than needed, crop to center
                 if new_width > width or new_height > height:
@@ -51,20 +77,12 @@ def create_paper_texture(width, height, color="white", noise_intensity=0.1, grai
                     bottom = top + height
                     texture = texture.crop((left, top, right, bottom))
                 
-                # Ensure the final size is exactly what we want
-                if texture.size != (width, height):
-                    texture = texture.resize((width, height), Image.Resampling.LANCZOS)
-                
                 # Adjust brightness and contrast
                 enhancer = ImageEnhance.Brightness(texture)
                 texture = enhancer.enhance(1.2)  # Slightly brighter
                 enhancer = ImageEnhance.Contrast(texture)
                 texture = enhancer.enhance(0.9)  # Slightly less contrast
                 
-                # Add alpha channel
-                alpha = Image.new('L', texture.size, 255)
-                texture.putalpha(alpha)
-                
                 print(f"Successfully loaded and processed texture: {texture_name}")
                 print(f"Final texture size: {texture.size}")
                 return texture
@@ -74,67 +92,77 @@ def create_paper_texture(width, height, color="white", noise_intensity=0.1, grai
             print(f"Current working directory: {os.getcwd()}")
             return None
     
-    # Create base image if no texture or texture loading failed
-    base = Image.new('RGB', (width, height), color)
-    
-    # Create noise layer
-    noise = np.random.normal(0.5, noise_intensity, (height, width, 3))
-    noise = np.clip(noise, 0, 1)
-    noise = (noise * 255).astype(np.uint8)
-    noise_img = Image.fromarray(noise)
+    # Create base color if no texture or texture loading failed
+    base = np.array(ImageColor.getrgb(color)[:3], dtype=np.int32)
     
-    # Add grain texture
-    grain = Image.new('L', (width, height))
-    draw = ImageDraw.Draw(grain)
-    for _ in range(width * height // 100):
-        x = random.randint(0, width-1)
-        y = random.randint(0, height-1)
-        size = random.randint(1, grain_size)
-        brightness = random.randint(200, 255)
-        draw.ellipse([x, y, x+size, y+size], fill=brightness)
+    rng = _rng if seed is None else np.random.Generator(np.random.SFC64(seed))
     
-    # Combine layers
-    result = Image.blend(base, noise_img, 0.1)
-    result = Image.composite(result, base, grain)
+    # Add grain texture (all specks sampled at once instead of one ellipse per speck)
+    grain_count = width * height // 100
+    xs = rng.integers(0, width, grain_count)
+    ys = rng.integers(0, height, grain_count)
+    sizes = rng.integers(1, grain_size + 1, grain_count)
+    brightness = rng.integers(200, 256, grain_count, dtype=np.uint8)
+    grain_arr = np.zeros((height, width), dtype=np.uint8)
+    # Each speck covers a (size+1)x(size+1) block, like the bounding box of the old ellipse
+    for dy in range(grain_size + 1):
+        for dx in range(grain_size + 1):
+            sel = sizes >= max(dx, dy)
+            grain_arr[np.minimum(ys[sel] + dy, height - 1), np.minimum(xs[sel] + dx, width - 1)] = brightness[sel]
     
-    # Add subtle shadows at edges
-    shadow = Image.new('L', (width, height), 255)
-    shadow_draw = ImageDraw.Draw(shadow)
-    shadow_width = width // 20
-    for i in range(shadow_width):
-        alpha = int(255 * (i / shadow_width))
-        shadow_draw.rectangle([i, i, width-i, height-i], outline=alpha)
+    # The noise only shows through the grain, so it is sampled for those pixels alone,
+    # straight into uint8: a uniform band around mid-gray whose spread matches the
+    # standard deviation given by noise_intensity
+    grain_ys, grain_xs = np.nonzero(grain_arr)
+    half_band = min(127.5, 3 ** 0.5 * noise_intensity * 255)
+    noise = rng.integers(round(127.5 - half_band), round(127.5 + half_band), size=(len(grain_ys), 3),
+                          dtype=np.uint8, endpoint=True)
     
-    # Apply shadow
-    result.putalpha(shadow)
-    
-    return result
+    # Combine layers: blend 10% of the noise into the base color, but only as much as the
+    # grain mask lets through (Image.blend followed by Image.composite); the rest is plain base color
+    result = np.empty((height, width, 3), dtype=np.uint8)
+    result[:] = base
+    grain = grain_arr[grain_ys, grain_xs, None].astype(np.int32)
+    result[grain_ys, grain_xs] = base + (noise - base) * grain // 2550
+    return Image.fromarray(result)
 
-def create_radial_blur_mask(width, height, center_x, center_y, sharp_radius, fade_radius):
-    """Creates a grayscale mask for radial blur (sharp center, fades out)."""
-    mask = Image.new('L', (width, height), 0)
-    draw = ImageDraw.Draw(mask)
-    draw.ellipse(
-        (center_x - sharp_radius, center_y - sharp_radius,
-         center_x + sharp_radius, center_y + sharp_radius),
-        fill=255
-    )
-    # Gaussian blur the sharp circle mask for a smooth falloff
-    # Ensure fade radius is larger than sharp radius
-    blur_amount = max(0.1, (fade_radius - sharp_radius) / 3.5)  # Adjusted divisor for smoothness
-    mask = mask.filter(ImageFilter.GaussianBlur(radius=blur_amount))
-    return mask
+@functools.lru_cache(maxsize=8)
+def _texture_background(width, height, color, texture_name, media_dir, texture_version):
+    """Decoded and resized texture file, reused across videos until the file changes (see texture_mtime);
+    None if it cannot be loaded."""
+    template = create_paper_texture(width, height, color, texture_name=texture_name, media_dir=media_dir)
+    if template is None:
+        print(f"Falling back to default background color: {color}")
+    return template
 
-def apply_vignette(image, intensity=0.3):
-    """Apply a subtle vignette effect to the image"""
-    width, height = image.size
-    mask = Image.new('L', (width, height), 255)
-    mask_draw = ImageDraw.Draw(mask)
-    
-    for i in range(width//4):
-        alpha = int(255 * (1 - (i / (width/4)) ** 2))
-        mask_draw.rectangle([i, i, width-i, height-i], outline=alpha)
-    
-    mask = mask.filter(ImageFilter.GaussianBlur(radius=width//30))
-    image.putalpha(mask)
-    return image
+@functools.lru_cache(maxsize=8)
+def _paper_background(width, height, color, noise_intensity, grain_size, seed):
+    """Procedural paper background; the same seed gives the same noise and grain in every process."""
+    return create_paper_texture(width, height, color, noise_intensity=noise_intensity, grain_size=grain_size,
+                                seed=seed)
+
+def get_background_template(width, height, color, noise_intensity, grain_size, texture_name=None, media_dir=None,
+                            texture_version=None, seed=None):
+    """Returns the frame background for a video, built once and cached.
+    Texture files are cached by texture_version, procedural backgrounds by seed.
+    The returned image is shared between frames, so callers must .copy() it before drawing."""
+    if texture_name and texture_name != "none" and media_dir:
+        template = _texture_background(width, height, color, texture_name, media_dir, texture_version)
+        if template is not None:
+            return template
+    # No texture, or texture loading failed: default background
+    return _paper_background(width, height, color, noise_intensity, grain_size, seed)
+
+@functools.lru_cache(maxsize=8)
+def _radial_mask(width, height, center_x, center_y, sharp_radius, fade_radius):
+    """Computes the radial mask as a smoothstep of the distance to the center, cached per geometry."""
+    yy, xx = np.ogrid[:height, :width]
+    r = np.hypot(xx - np.float32(center_x), yy - np.float32(center_y))
+    t = np.clip((fade_radius - r) / max(fade_radius - sharp_radius, 1e-6), 0, 1)
+    return Image.fromarray((t * t * (3 - 2 * t) * 255).astype(np.uint8))
+
+def create_radial_blur_mask(width, height, center_x, center_y, sharp_radius, fade_radius):
+    """Creates a grayscale mask for radial blur (sharp center, fades out).
+    The mask is shared between frames, so it must not be modified in place."""
+    # Fully opaque inside sharp_radius, smooth falloff to transparent at fade_radius
+    return _radial_mask(width, height, center_x, center_y, sharp_radius, fade_radius)
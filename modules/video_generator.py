@@ -1,14 +1,21 @@
 import os
+import re
+import atexit
 import uuid
 import traceback
 import random
+import queue
+import subprocess
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np
-from PIL import Image
-from moviepy import ImageSequenceClip
 
-from modules.image_processing import create_text_image_frame, FontLoadError, FontDrawError, get_random_font
-from modules.ai_providers import generate_ai_text_snippet
-from modules.text_generation import generate_random_text_snippet
+from modules.image_processing import (create_text_image_frame, FontLoadError, FontDrawError, get_random_font,
+                                      get_frame_background)
+from modules.ai_providers import generate_ai_text_batch
+from modules.text_generation import generate_random_text_snippet, generate_random_text_snippets
 
 # Default constants
 RADIAL_SHARP_RADIUS_FACTOR = 0.3  # For 'radial': Percentage of min(W,H) to keep perfectly sharp
@@ -17,6 +24,264 @@ DEFAULT_VERTICAL_SPREAD_FACTOR = 1.3  # Base multiplier for line height
 MAX_FONT_RETRIES_PER_FRAME = 5
 FRAMES_PER_SNIPPET = 3  # Number of frames to show each text snippet before changing
 TEXT_POOL_SIZE = 10  # Number of text snippets to keep in rotation
+# Server processes sharing this host (gunicorn_config.py exports its worker count); each one
+# has its own render pool, so the cores are split between them
+SERVER_WORKERS = max(1, int(os.environ.get('GUNICORN_WORKERS', 1)))
+# Processes used to render frames in parallel (1 renders in-process); one core is left
+# to the main process and the x264 encoder it feeds
+RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS', max(1, ((os.cpu_count() or 1) - 1) // SERVER_WORKERS)))
+MAX_AI_ATTEMPTS = 3  # Failed AI requests tolerated before falling back to random text
+AI_FIRST_BATCH_SIZE = 2  # Snippets in the first AI request, kept small so rendering starts early
+
+# Frames can be rendered at 1/N of the output size and upscaled by FFmpeg: about N^2 times
+# less pixel work, at the cost of softer text
+INTERNAL_SCALE = max(1, int(os.environ.get('INTERNAL_SCALE', 1)))
+X264_PRESET = os.environ.get('X264_PRESET', 'faster')  # Text frames are flat, a fast preset loses no visible quality
+FONT_EXTENSIONS = frozenset({".ttf", ".otf", ".ttc"})  # Font files picked up from FONT_DIR
+
+# Font discovery results, shared by every request handled in this process
+_FONT_DIR_CACHE = {}  # (font_dir, mtime_ns) -> tuple of font paths
+_SYSTEM_FONT_CACHE = None
+_SYSTEM_FONT_LOCK = threading.Lock()
+
+# Rendered frame pixels, reused from one frame to the next (one array per thread)
+_FRAME_BUFFER = threading.local()
+
+def _find_system_fonts():
+    """Scans system fonts through matplotlib once per process (the scan walks the whole filesystem)."""
+    global _SYSTEM_FONT_CACHE
+    with _SYSTEM_FONT_LOCK:
+        if _SYSTEM_FONT_CACHE is None:
+            import matplotlib.font_manager as fm
+            _SYSTEM_FONT_CACHE = fm.findSystemFonts(fontpaths=None, fontext='ttf')
+        return _SYSTEM_FONT_CACHE
+
+def discover_fonts(font_dir):
+    """Returns a tuple of the usable font files, reusing the previous scan while the directory is unchanged."""
+    if font_dir and os.path.isdir(font_dir):
+        key = (font_dir, os.stat(font_dir).st_mtime_ns)
+        font_paths = _FONT_DIR_CACHE.get(key)
+        if font_paths is None:
+            print(f"Looking for fonts in specified directory: {font_dir}")
+            with os.scandir(font_dir) as entries:
+                font_paths = tuple(entry.path for entry in entries
+                                   if os.path.splitext(entry.name)[1].lower() in FONT_EXTENSIONS and entry.is_file())
+            _FONT_DIR_CACHE[key] = font_paths
+        return font_paths  # Immutable, so the cached scan is shared without copying
+
+    print("FONT_DIR not specified or invalid, searching system fonts...")
+    try:
+        return tuple(_find_system_fonts())
+    except Exception as e:
+        print(f"Error finding system fonts: {e}")
+        return ()
+
+def _frame_buffer(height, width):
+    """Returns this thread's reusable RGB frame array, reallocated only when the size changes."""
+    frame = getattr(_FRAME_BUFFER, 'frame', None)
+    if frame is None or frame.shape[:2] != (height, width):
+        frame = _FRAME_BUFFER.frame = np.empty((height, width, 3), dtype=np.uint8)
+    return frame
+
+def _render_frame(task, settings):
+    """Renders one planned frame into the thread's frame buffer and returns that NumPy array.
+    The next frame overwrites it, so it has to be written out (or sent back by the worker) first."""
+    frame = _frame_buffer(settings['height'], settings['width'])
+    create_text_image_frame(
+        settings['width'], settings['height'],
+        task["lines"],
+        task["highlight_index"],
+        settings['highlighted_text'],
+        task["font_path"],
+        settings['font_size'],
+        settings['text_color'],
+        settings['background_color'],
+        settings['highlight_color'],
+        settings['blur_type'],
+        settings['blur_radius'],
+        RADIAL_SHARP_RADIUS_FACTOR,
+        settings['vertical_spread_factor'],
+        y_offset=task["y_offset"],
+        background_texture=settings['background_texture'],
+        media_dir=settings['media_dir'],
+        background=settings['background'],
+        out=frame
+    )
+    return frame
+
+# One render pool shared by every request of this process, created on first use. Its workers
+# come from a forkserver (or are spawned), never forked from this multi-threaded server process,
+# so they hold no copies of its locks or of the FFmpeg pipes of other requests.
+_RENDER_POOL = None
+_RENDER_POOL_LOCK = threading.Lock()
+# Frames queued in the pool across all requests, so concurrent videos share the workers
+# instead of piling up rendered frames
+_RENDER_SLOTS = threading.BoundedSemaphore(2 * max(1, RENDER_WORKERS))
+
+def _get_render_pool():
+    """Returns the shared render pool, creating it on first use; None if it cannot be started."""
+    global _RENDER_POOL
+    with _RENDER_POOL_LOCK:
+        if _RENDER_POOL is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            try:
+                _RENDER_POOL = ProcessPoolExecutor(max_workers=RENDER_WORKERS,
+                                                   mp_context=multiprocessing.get_context(method))
+            except (OSError, NotImplementedError, ValueError) as e:
+                print(f"Warning: Could not start render workers ({e}). Rendering frames in-process.")
+        return _RENDER_POOL
+
+def shutdown_render_pool():
+    """Stops the shared render pool's worker processes (at exit, or from the gunicorn worker_exit hook)."""
+    global _RENDER_POOL
+    with _RENDER_POOL_LOCK:
+        pool, _RENDER_POOL = _RENDER_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+atexit.register(shutdown_render_pool)
+
+def _discard_render_pool(pool):
+    """Drops a broken render pool so the next request starts a fresh one."""
+    global _RENDER_POOL
+    with _RENDER_POOL_LOCK:
+        if _RENDER_POOL is pool:
+            _RENDER_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _submit_frame(pool, task, settings):
+    """Queues a frame on the render pool once a slot is free; the slot is freed when it finishes."""
+    _RENDER_SLOTS.acquire()
+    try:
+        future = pool.submit(_render_frame_in_worker, task, settings)
+    except BaseException:
+        _RENDER_SLOTS.release()
+        raise
+    future.add_done_callback(lambda _: _RENDER_SLOTS.release())
+    return future
+
+def _render_frame_in_worker(task, settings):
+    """Renders a frame in a pool worker, using that process's cached copy of the background."""
+    background = get_frame_background(settings['width'], settings['height'], settings['background_color'],
+                                      settings['background_texture'], settings['media_dir'],
+                                      seed=settings['background_seed'])
+    return _render_frame(task, dict(settings, background=background))
+
+# Likely a real sentence: at least 40 characters, a space, some punctuation and at least 5 words
+_SENTENCE_RE = re.compile(r'(?=.{40})(?=.* )(?=.*[.!?])\s*(?:\S+\s+){4}\S', re.DOTALL)
+
+def _is_valid_ai_text(lines):
+    """Verify the text has enough characters and isn't just gibberish."""
+    return all(_SENTENCE_RE.match(line) for line in lines)
+
+def _resolve_selected_font(selected_font, font_dir):
+    """Path of the user-selected font, checked once per video; None for random fonts."""
+    if selected_font == 'random':
+        return None
+    font_path = os.path.join(font_dir, selected_font)
+    if os.path.exists(font_path):
+        return font_path
+    print(f"Selected font {selected_font} not accessible, falling back to random")
+    return None
+
+def _pick_font(selected_font_path, valid_fonts, failed_fonts):
+    """Returns the user-selected font unless it has failed, otherwise a random one from valid_fonts
+    (the discovered fonts that have not failed yet)."""
+    if selected_font_path is not None and selected_font_path not in failed_fonts:
+        return selected_font_path
+    return get_random_font(valid_fonts)
+
+def _collect_frame(task, future, settings, pick_font, mark_font_failed):
+    """Waits for a frame from the render workers (or renders it in-process when future is None),
+    retrying in-process with another font when the font fails. Returns (frame, error_message)."""
+    font_retries = 0
+    while font_retries < MAX_FONT_RETRIES_PER_FRAME:
+        try:
+            if future is not None:
+                return future.result(), None
+            return _render_frame(task, settings), None
+        except BrokenProcessPool as e:
+            print(f"    Warning: Render worker crashed ({e}). Rendering frame in-process.")
+            future = None
+            continue
+        except (FontLoadError, FontDrawError) as e:
+            print(f"    Warning: Font '{os.path.basename(task['font_path'])}' failed. ({e})")
+            mark_font_failed(task["font_path"])
+            font_retries += 1
+
+        # Retry this frame in-process with another font
+        future = None
+        font_path = pick_font()
+        if font_path is None:
+            return None, "No usable fonts available after multiple attempts."
+        task = dict(task, font_path=font_path)
+
+    return None, f"Failed to generate frame {task['frame_num'] + 1}. Font issues likely."
+
+def _produce_ai_texts(text_queue, snippets_needed, ai_request):
+    """Background thread: fills text_queue with AI snippets, falling back to random text
+    after repeated failures. Puts None once no more snippets will come."""
+    produced = 0
+    failed_attempts = 0
+    try:
+        while produced < snippets_needed:
+            texts = []
+            if failed_attempts < MAX_AI_ATTEMPTS:
+                batch_size = AI_FIRST_BATCH_SIZE if produced == 0 else snippets_needed - produced
+                print(f"  Requesting {batch_size} AI text snippets...")
+                for lines, hl_index in generate_ai_text_batch(batch_size=batch_size, **ai_request):
+                    if _is_valid_ai_text(lines):
+                        texts.append({"lines": lines, "highlight_index": hl_index})
+                if not texts:
+                    failed_attempts += 1
+                    print(f"    AI text generation attempt {failed_attempts} failed")
+            else:
+                print("    AI text generation failed repeatedly. Falling back to random text generation")
+                # Fresh text every time: the cached variants would repeat snippets within the pool
+                lines, hl_index = generate_random_text_snippet(ai_request['highlighted_text'],
+                                                               ai_request['min_lines'], ai_request['max_lines'],
+                                                               use_cache=False)
+                if not lines or hl_index == -1:
+                    break
+                texts.append({"lines": lines, "highlight_index": hl_index})
+
+            for text in texts[:snippets_needed - produced]:
+                text_queue.put(text)
+                produced += 1
+    except Exception as e:
+        print(f"Error in AI text generation thread: {e}")
+        traceback.print_exc()
+    finally:
+        text_queue.put(None)
+
+def _ffmpeg_exe():
+    """Path of the FFmpeg binary bundled with imageio-ffmpeg, or 'ffmpeg' from PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return 'ffmpeg'
+
+def _open_video_writer(output_path, frame_width, frame_height, fps, width, height):
+    """Starts an FFmpeg process that encodes the raw RGB frames written to its stdin as H.264,
+    scaling them to width x height if they were rendered at another size."""
+    command = [_ffmpeg_exe(), '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{frame_width}x{frame_height}', '-r', str(fps), '-i', '-',
+               '-an', '-c:v', 'libx264', '-preset', X264_PRESET, '-tune', 'stillimage', '-threads', '0',
+               '-x264-params', f'keyint={max(1, round(fps * 2))}', '-pix_fmt', 'yuv420p', '-movflags', '+faststart']
+    # yuv420p needs even dimensions
+    if (frame_width, frame_height) != (width, height):
+        command += ['-vf', f'scale={width - width % 2}:{height - height % 2}:flags=lanczos']
+    elif width % 2 or height % 2:
+        command += ['-vf', 'crop=trunc(iw/2)*2:trunc(ih/2)*2']
+    command.append(output_path)
+    return subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+def _close_video_writer(writer):
+    """Sends end of input to FFmpeg and waits for it to finish the file."""
+    _, stderr = writer.communicate()
+    if writer.returncode != 0:
+        raise RuntimeError(f"FFmpeg exited with code {writer.returncode}: {stderr.decode(errors='replace').strip()}")
 
 def generate_video(params, app_config):
     """Generates the video based on input parameters."""
@@ -79,19 +344,7 @@ def generate_video(params, app_config):
             ai_enabled = False
 
     # --- Font Discovery ---
-    font_paths = []
-    if font_dir and os.path.isdir(font_dir):
-        print(f"Looking for fonts in specified directory: {font_dir}")
-        for filename in os.listdir(font_dir):
-            if filename.lower().endswith((".ttf", ".otf")):
-                font_paths.append(os.path.join(font_dir, filename))
-    else:
-        print("FONT_DIR not specified or invalid, searching system fonts...")
-        try:
-            import matplotlib.font_manager as fm
-            font_paths = fm.findSystemFonts(fontpaths=None, fontext='ttf')
-        except Exception as e:
-            print(f"Error finding system fonts: {e}")
+    font_paths = discover_fonts(font_dir)
 
     if not font_paths:
         print("ERROR: No fonts found in font dir or system. Cannot proceed.")
@@ -100,166 +353,190 @@ def generate_video(params, app_config):
     print(f"Found {len(font_paths)} potential fonts.")
 
     # --- Generate Frames with Dynamic Text ---
-    frames = []
-    failed_fonts = set()
     print("\nGenerating frames...")
-    
+
+    # AI text is fetched by a background thread so frames of the first snippets
+    # render while the provider is still answering
+    text_queue = None
+    random_texts = None
+    snippets_needed = min(TEXT_POOL_SIZE, -(-total_frames // FRAMES_PER_SNIPPET))
+    if ai_enabled and ai_client:
+        text_queue = queue.Queue(maxsize=TEXT_POOL_SIZE + 1)
+        ai_request = {
+            'client': ai_client,
+            'provider': params['ai_provider'],
+            'model': mistral_model,
+            'highlighted_text': params['highlighted_text'],
+            'min_lines': min_lines,
+            'max_lines': max_lines
+        }
+        threading.Thread(target=_produce_ai_texts, args=(text_queue, snippets_needed, ai_request),
+                         daemon=True).start()
+    else:
+        # Distinct snippets for the whole pool, so a video never shows the same one twice
+        random_texts = iter(generate_random_text_snippets(highlighted_text, min_lines, max_lines, snippets_needed))
+
+    # Frames are rendered at 1/INTERNAL_SCALE of the output size, sizes scaled to match
+    render_width = max(2, width // INTERNAL_SCALE)
+    render_height = max(2, height // INTERNAL_SCALE)
+    render_settings = {
+        'width': render_width,
+        'height': render_height,
+        'highlighted_text': highlighted_text,
+        'font_size': max(1, font_size // INTERNAL_SCALE),
+        'text_color': text_color,
+        'background_color': background_color,
+        'highlight_color': highlight_color,
+        'blur_type': blur_type,
+        'blur_radius': blur_radius / INTERNAL_SCALE,
+        'vertical_spread_factor': vertical_spread_factor,  # Now using a dynamic value
+        'background_texture': background_texture,
+        'media_dir': media_dir,
+        # Fresh paper grain for every video; render workers are separate processes, so they
+        # rebuild the background from this seed instead of receiving it with every task
+        'background_seed': random.getrandbits(64)
+    }
+    # Sent with every task to the render workers, which build their own copy of the background
+    worker_settings = dict(render_settings)
+    render_settings['background'] = get_frame_background(render_width, render_height, background_color,
+                                                         background_texture, media_dir,
+                                                         seed=render_settings['background_seed'])
+
+    workers = min(RENDER_WORKERS, total_frames)
+    executor = _get_render_pool() if workers > 1 else None
+
+    selected_font_path = _resolve_selected_font(selected_font, font_dir)
+    failed_fonts = set()
+    valid_fonts = list(font_paths)  # Updated as fonts fail, instead of filtering on every pick
+
+    def pick_font():
+        return _pick_font(selected_font_path, valid_fonts, failed_fonts)
+
+    def mark_font_failed(font_path):
+        if font_path not in failed_fonts:
+            failed_fonts.add(font_path)
+            if font_path in valid_fonts:
+                valid_fonts.remove(font_path)
+
     # Initialize text pool
     text_pool = []
+    text_source_exhausted = False
     current_pool_index = 0
     frames_with_current_text = 0
-    
-    frame_num = 0
-    while frame_num < total_frames:
-        # Check if we need new text
-        if frames_with_current_text >= FRAMES_PER_SNIPPET or not text_pool:
-            # Generate new text if pool is empty or we need to rotate
-            if len(text_pool) < TEXT_POOL_SIZE:
-                # Generate new text
-                if ai_enabled and ai_client:
-                    print(f"  Generating new AI text for frame {frame_num + 1}...")
-                    # Try up to 3 times to get valid AI text
-                    max_ai_attempts = 3
-                    ai_success = False
-                    
-                    for attempt in range(max_ai_attempts):
-                        lines, hl_index = generate_ai_text_snippet(
-                            client=ai_client,
-                            provider=params['ai_provider'],
-                            model=mistral_model,
-                            highlighted_text=params['highlighted_text'],
-                            min_lines=min_lines,
-                            max_lines=max_lines
-                        )
-                        
-                        # Check if we got valid AI text
-                        if lines and hl_index != -1:
-                            # Verify the text has enough characters and isn't just gibberish
-                            valid_lines = True
-                            for line in lines:
-                                # Check if this is likely a real sentence (at least 40 chars, has spaces, etc.)
-                                if (len(line) < 40 or 
-                                    ' ' not in line or 
-                                    len(line.split()) < 5 or
-                                    not any(p in line for p in ['.', '!', '?'])):
-                                    valid_lines = False
-                                    break
-                                    
-                            if valid_lines:
-                                text_pool.append({"lines": lines, "highlight_index": hl_index})
-                                ai_success = True
-                                break
-                        
-                        if attempt < max_ai_attempts - 1:
-                            print(f"    AI text generation attempt {attempt+1} failed, retrying...")
-                    
-                    # Fall back to random text if all AI attempts failed
-                    if not ai_success:
-                        print("    All AI text generation attempts failed. Falling back to random text generation")
-                        lines, hl_index = generate_random_text_snippet(params['highlighted_text'], min_lines, max_lines)
-                        if lines and hl_index != -1:
-                            text_pool.append({"lines": lines, "highlight_index": hl_index})
-                else:
-                    print(f"  Generating random text for frame {frame_num + 1}...")
-                    lines, hl_index = generate_random_text_snippet(params['highlighted_text'], min_lines, max_lines)
-                    if lines and hl_index != -1:
-                        text_pool.append({"lines": lines, "highlight_index": hl_index})
-            
-            # Rotate to next text in pool
-            if text_pool:
-                current_pool_index = (current_pool_index + 1) % len(text_pool)
-                frames_with_current_text = 0
-            else:
-                print("ERROR: Failed to generate any valid text. Stopping video generation.")
-                return None, "Failed to generate valid text content."
-
-        # Get current text from pool
-        current_text = text_pool[current_pool_index]
-        frames_with_current_text += 1
-
-        # Select font and generate frame
-        font_retries = 0
-        frame_generated = False
-        while font_retries < MAX_FONT_RETRIES_PER_FRAME:
-            # Use selected font if specified, otherwise get random font
-            if selected_font != 'random':
-                current_font_path = os.path.join(font_dir, selected_font)
-                if not os.path.exists(current_font_path):
-                    print(f"Selected font {selected_font} not accessible, falling back to random")
-                    current_font_path = get_random_font(font_paths, exclude_list=failed_fonts)
-            else:
-                current_font_path = get_random_font(font_paths, exclude_list=failed_fonts)
-            
-            if current_font_path is None:
-                return None, "No usable fonts available after multiple attempts."
-
-            try:
-                # Add slight randomization to text position
-                position_jitter = random.uniform(-5, 5)
-                
-                img = create_text_image_frame(
-                    width, height,
-                    current_text["lines"], 
-                    current_text["highlight_index"],
-                    highlighted_text,
-                    current_font_path, 
-                    font_size,
-                    text_color, 
-                    background_color, 
-                    highlight_color,
-                    blur_type, 
-                    blur_radius, 
-                    RADIAL_SHARP_RADIUS_FACTOR,
-                    vertical_spread_factor,  # Now using a dynamic value
-                    y_offset=position_jitter,
-                    background_texture=background_texture,
-                    media_dir=media_dir
-                )
-
-                frame_np = np.array(img)
-                frames.append(frame_np)
-                frame_generated = True
-                
-                if frame_num % (total_frames // 10) == 0:
-                    print(f"  Progress: {frame_num}/{total_frames} frames ({len(text_pool)} unique texts)")
-                
-                break
-
-            except (FontLoadError, FontDrawError) as e:
-                print(f"    Warning: Font '{os.path.basename(current_font_path)}' failed. ({e})")
-                failed_fonts.add(current_font_path)
-                font_retries += 1
-
-        if not frame_generated:
-            return None, f"Failed to generate frame {frame_num + 1}. Font issues likely."
-
-        frame_num += 1
-
-    # --- Create Video ---
-    if not frames:
-        print("ERROR: No frames were generated. Cannot create video.")
-        return None, "No frames were generated, possibly due to persistent font errors."
-
-    if len(frames) < total_frames:
-        print(f"Warning: Only {len(frames)}/{total_frames} frames were generated due to errors. Video will be shorter.")
 
     # Generate unique filename
     unique_id = uuid.uuid4()
     output_filename = f"text_match_cut_{unique_id}.mp4"
     output_path = os.path.join(app_config['UPLOAD_FOLDER'], output_filename)
 
-    print(f"\nCompiling video to {output_path}...")
+    # Frames are piped to FFmpeg as soon as they are rendered (in order), so encoding
+    # overlaps rendering and only a few frames are held in memory at a time
+    print(f"\nEncoding video to {output_path}...")
+    writer = None
+    video_saved = False
+    frames_written = 0
+    pending = []  # (task, future) of frames handed to the render workers, in frame order
+
+    def stream_frame(task, future):
+        nonlocal frames_written
+        frame_np, error = _collect_frame(task, future, render_settings, pick_font, mark_font_failed)
+        if frame_np is not None:
+            writer.stdin.write(frame_np)
+            frames_written += 1
+        return error
+
+    # Frames at which progress is reported (about every 10%)
+    progress_marks = set(range(0, total_frames, max(1, total_frames // 10)))
+
     try:
-        clip = ImageSequenceClip(frames, fps=fps)
-        clip.write_videofile(output_path,
-                             codec='libx264',
-                             preset='medium',
-                             fps=fps,
-                             threads=max(1, os.cpu_count() // 2),
-                             logger=None,
-                             audio=False)
-
-        clip.close()
+        writer = _open_video_writer(output_path, render_width, render_height, fps, width, height)
+
+        frame_num = 0
+        while frame_num < total_frames:
+            # Check if we need new text
+            if frames_with_current_text >= FRAMES_PER_SNIPPET or not text_pool:
+                # Generate new text if pool is empty or we need to rotate
+                if len(text_pool) < TEXT_POOL_SIZE and not text_source_exhausted:
+                    if text_queue is not None:
+                        new_text = text_queue.get()
+                        if new_text is None:
+                            text_source_exhausted = True
+                        else:
+                            text_pool.append(new_text)
+                    else:
+                        print(f"  Generating random text for frame {frame_num + 1}...")
+                        lines, hl_index = next(random_texts, (None, -1))
+                        if lines:
+                            text_pool.append({"lines": lines, "highlight_index": hl_index})
+                        else:
+                            text_source_exhausted = True
+
+                # Rotate to next text in pool
+                if text_pool:
+                    current_pool_index = (current_pool_index + 1) % len(text_pool)
+                    frames_with_current_text = 0
+                else:
+                    print("ERROR: Failed to generate any valid text. Stopping video generation.")
+                    return None, "Failed to generate valid text content."
+
+            # Get current text from pool
+            current_text = text_pool[current_pool_index]
+            frames_with_current_text += 1
+
+            # Select font; worker processes only do the drawing
+            current_font_path = pick_font()
+            if current_font_path is None:
+                return None, "No usable fonts available after multiple attempts."
+            task = {
+                "frame_num": frame_num,
+                "lines": current_text["lines"],
+                "highlight_index": current_text["highlight_index"],
+                "font_path": current_font_path,
+                "y_offset": random.uniform(-5, 5) / INTERNAL_SCALE  # Add slight randomization to text position
+            }
+
+            future = None
+            if executor:
+                try:
+                    future = _submit_frame(executor, task, worker_settings)
+                except (BrokenProcessPool, RuntimeError) as e:
+                    print(f"Warning: Render workers unavailable ({e}). Rendering frames in-process.")
+                    _discard_render_pool(executor)
+                    executor = None
+
+            if future is not None:
+                pending.append((task, future))
+                # Write finished frames; wait once too many rendered frames are queued up
+                while pending and (pending[0][1].done() or len(pending) > 2 * workers):
+                    error = stream_frame(*pending.pop(0))
+                    if error:
+                        return None, error
+            else:
+                # Keep frames in order: finish anything already handed to the workers first
+                while pending:
+                    error = stream_frame(*pending.pop(0))
+                    if error:
+                        return None, error
+                error = stream_frame(task, None)
+                if error:
+                    return None, error
+
+            if frame_num in progress_marks:
+                print(f"  Progress: {frame_num}/{total_frames} frames ({len(text_pool)} unique texts)")
+
+            frame_num += 1
+
+        while pending:
+            error = stream_frame(*pending.pop(0))
+            if error:
+                return None, error
+
+        if not frames_written:
+            print("ERROR: No frames were generated. Cannot create video.")
+            return None, "No frames were generated, possibly due to persistent font errors."
+
+        _close_video_writer(writer)
+        video_saved = True
         print(f"\nVideo saved successfully as '{output_filename}'")
 
         if failed_fonts:
@@ -272,10 +549,18 @@ def generate_video(params, app_config):
     except Exception as e:
         print(f"\nError during video writing: {e}")
         traceback.print_exc()
-        error_message = f"Error during video writing: {e}. Check server logs and FFmpeg installation/codec support (libx264)."
-        if os.path.exists(output_path):
-            try:
-                os.remove(output_path)
-            except OSError:
-                pass
-        return None, error_message
+        return None, f"Error during video writing: {e}. Check server logs and FFmpeg installation/codec support (libx264)."
+
+    finally:
+        # The pool is shared: only drop this video's frames that have not started yet
+        for _, future in pending:
+            future.cancel()
+        if not video_saved:
+            if writer:
+                writer.kill()
+                writer.communicate()
+            if os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except OSError:
+                    pass
@@ -39,6 +39,10 @@ app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', '/tmp/match_cut_ou
 app.config['FONT_DIR'] = os.environ.get('FONT_DIR', 'fonts')
 app.config['MEDIA_DIR'] = os.environ.get('MEDIA_DIR', 'media')
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB limit
+# x264 preset for the encoder; the clips are short and downloaded right away, so favor speed
+app.config['FFMPEG_PRESET'] = os.environ.get('FFMPEG_PRESET', 'ultrafast')
+# x264 constant quality (lower is better quality and bigger files)
+app.config['FFMPEG_CRF'] = os.environ.get('FFMPEG_CRF', '23')
 
 # Ensure directories exist
 for directory in [app.config['UPLOAD_FOLDER'], app.config['FONT_DIR'], app.config['MEDIA_DIR']]:
@@ -18,7 +18,7 @@ def main():
         "flask",
         "PIL",
         "numpy",
-        "moviepy",
+        "imageio_ffmpeg",
         "matplotlib"
     ]
     
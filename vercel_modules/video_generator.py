@@ -4,12 +4,37 @@ Este archivo es una versión simplificada del módulo video_generator.py
 optimizada para funcionar en el entorno serverless de Vercel
 """
 import os
-import uuid
 import traceback
 import random
-import numpy as np
-from PIL import Image
-from moviepy.editor import ImageSequenceClip
+import shutil
+import subprocess
+import functools
+from PIL import Image, ImageColor
+
+def _ffmpeg_exe():
+    """Ruta del ffmpeg incluido en imageio-ffmpeg, o el ffmpeg del PATH si no está disponible."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        # imageio-ffmpeg lanza RuntimeError si no encuentra ningún binario
+        return shutil.which('ffmpeg') or 'ffmpeg'
+
+# Videos ya codificados en esta instancia: ajustes -> nombre del archivo en UPLOAD_FOLDER
+_ENCODED_VIDEOS = {}
+_MAX_ENCODED_VIDEOS = 64
+# Directorios de salida ya creados por esta instancia
+_READY_DIRS = set()
+
+@functools.lru_cache(maxsize=256)
+def _rgb(color):
+    """Color del formulario ('#RRGGBB' o nombre) como tupla (r, g, b), parseado una vez por color."""
+    return ImageColor.getrgb(color)[:3]
+
+@functools.lru_cache(maxsize=4)  # Hasta ~6 MB por frame a 1920x1080
+def _background_frame(width, height, color):
+    """Frame rgb24 del fondo sólido, reutilizado mientras la instancia siga activa."""
+    return Image.new('RGB', (width, height), _rgb(color)).tobytes()
 
 def generate_video(params, app_config):
     """
@@ -17,42 +42,58 @@ def generate_video(params, app_config):
     Simula la generación del video y devuelve un resultado de prueba
     """
     try:
-        # Para Vercel, limitamos la duración y resolución
-        width = min(params['width'], 1920)
-        height = min(params['height'], 1080)
-        fps = params['fps']
-        duration_seconds = min(params['duration'], 10)
+        # Para Vercel, limitamos la duración y resolución (antes de reservar nada)
+        width = max(2, min(int(params['width']), 1920))
+        height = max(2, min(int(params['height']), 1080))
+        # yuv420p necesita dimensiones pares
+        width -= width % 2
+        height -= height % 2
+        fps = max(1, min(int(params['fps']), 60))
+        duration_seconds = max(1, min(int(params['duration']), 10))
+        total_frames = fps * duration_seconds
         highlighted_text = params['highlighted_text']
         
+        # El video solo depende de estos ajustes: si ya se codificó uno igual y el archivo
+        # sigue en disco, se devuelve ese mismo archivo sin volver a ejecutar ffmpeg
+        video_key = (app_config['UPLOAD_FOLDER'], width, height, fps, duration_seconds,
+                     _rgb(params['background_color']), app_config.get('FFMPEG_PRESET', 'ultrafast'),
+                     str(app_config.get('FFMPEG_CRF', 23)))
+        cached_filename = _ENCODED_VIDEOS.get(video_key)
+        if cached_filename and os.path.exists(os.path.join(app_config['UPLOAD_FOLDER'], cached_filename)):
+            return cached_filename, None
+        
         # Generamos un nombre único para el archivo de salida
-        unique_id = uuid.uuid4()
+        unique_id = os.urandom(8).hex()
         output_filename = f"text_match_cut_{unique_id}.mp4"
         output_path = os.path.join(app_config['UPLOAD_FOLDER'], output_filename)
         
-        # Aseguramos que el directorio de salida exista
-        os.makedirs(app_config['UPLOAD_FOLDER'], exist_ok=True)
+        # Aseguramos que el directorio de salida exista (una vez por instancia)
+        if app_config['UPLOAD_FOLDER'] not in _READY_DIRS:
+            os.makedirs(app_config['UPLOAD_FOLDER'], exist_ok=True)
+            _READY_DIRS.add(app_config['UPLOAD_FOLDER'])
         
         # Para prueba en Vercel, creamos un video muy simple
         # En un entorno de producción, implementaríamos la lógica completa
-        frames = []
-        # Crear frames de prueba
-        for i in range(fps * duration_seconds):
-            # Crear un frame con un color de fondo y el texto destacado
-            img = Image.new('RGB', (width, height), params['background_color'])
-            frames.append(np.array(img))
-        
-        # Crear el clip de video y guardarlo
-        clip = ImageSequenceClip(frames, fps=fps)
-        clip.write_videofile(output_path,
-                             codec='libx264',
-                             preset='ultrafast',
-                             fps=fps,
-                             threads=2,
-                             logger=None,
-                             audio=False)
-        
-        clip.close()
+        # Todos los frames son el mismo fondo de color sólido: se envía un solo frame
+        # rgb24 por stdin y ffmpeg lo repite (filtro loop) hasta completar la duración
+        frame_bytes = _background_frame(width, height, params['background_color'])
+        command = [_ffmpeg_exe(), '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-framerate', str(fps), '-i', '-',
+                   '-vf', f'loop=loop={total_frames - 1}:size=1',
+                   '-an', '-c:v', 'libx264', '-preset', app_config.get('FFMPEG_PRESET', 'ultrafast'),
+                   '-tune', 'stillimage', '-crf', str(app_config.get('FFMPEG_CRF', 23)),
+                   # Un solo keyframe: el contenido nunca cambia, así que el resto son frames de salto
+                   '-g', str(total_frames), '-keyint_min', str(total_frames), '-sc_threshold', '0',
+                   '-threads', str(os.cpu_count() or 1),
+                   '-pix_fmt', 'yuv420p', '-movflags', '+faststart', output_path]
+        result = subprocess.run(command, input=frame_bytes, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg terminó con código {result.returncode}: "
+                               f"{result.stderr.decode(errors='replace').strip()}")
         
+        if len(_ENCODED_VIDEOS) >= _MAX_ENCODED_VIDEOS:
+            _ENCODED_VIDEOS.pop(next(iter(_ENCODED_VIDEOS)))  # Descarta el más antiguo
+        _ENCODED_VIDEOS[video_key] = output_filename
         return output_filename, None
     
     except Exception as e:
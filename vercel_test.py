@@ -1,6 +1,7 @@
 """
 Script para probar el despliegue de Vercel localmente
 """
+import html
 import http.server
 import socketserver
 import os
@@ -8,49 +9,34 @@ import sys
 
 PORT = 8000
 
-class VercelHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        # Para simular el comportamiento de Vercel, redirigimos todas las peticiones
-        # al archivo index.py si no son archivos estáticos
-        
-        # Archivos estáticos que deben ser servidos directamente
-        static_exts = ['.css', '.js', '.jpg', '.jpeg', '.png', '.gif', '.ico', '.ttf', '.otf']
-        
-        if any(self.path.endswith(ext) for ext in static_exts):
-            # Servir archivos estáticos directamente
-            return super().do_GET()
-        else:
-            # Cualquier otra ruta se redirige a la aplicación Flask
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
-            # En un entorno real, aquí invocaríamos a la aplicación Flask
-            # Por simplicidad, solo mostramos un mensaje informativo
-            message = """
+# Archivos estáticos que deben ser servidos directamente
+STATIC_EXTS = ('.css', '.js', '.jpg', '.jpeg', '.png', '.gif', '.ico', '.ttf', '.otf')
+
+# Página informativa, codificada una sola vez; la ruta pedida va entre PAGE_PREFIX y PAGE_SUFFIX
+PAGE_PREFIX = """
             <html>
             <head>
                 <title>Simulación de Vercel</title>
                 <style>
-                    body {{
+                    body {
                         font-family: Arial, sans-serif;
                         max-width: 800px;
                         margin: 40px auto;
                         padding: 20px;
                         line-height: 1.6;
-                    }}
-                    pre {{
+                    }
+                    pre {
                         background: #f4f4f4;
                         border-left: 3px solid #f36d33;
                         padding: 15px;
                         overflow: auto;
-                    }}
-                    .info {{
+                    }
+                    .info {
                         background: #e8f5ff;
                         border-left: 4px solid #2196F3;
                         padding: 10px 20px;
                         margin: 20px 0;
-                    }}
+                    }
                 </style>
             </head>
             <body>
@@ -61,7 +47,8 @@ class VercelHandler(http.server.SimpleHTTPRequestHandler):
                 </div>
                 <h2>Información de la solicitud:</h2>
                 <pre>
-                Ruta: {path}
+                Ruta: """.encode()
+PAGE_SUFFIX = """
                 </pre>
                 <p>Para probar la aplicación real:</p>
                 <ol>
@@ -76,13 +63,36 @@ class VercelHandler(http.server.SimpleHTTPRequestHandler):
                 </ol>
             </body>
             </html>
-            """.format(path=self.path)
+            """.encode()
+
+class VercelHandler(http.server.SimpleHTTPRequestHandler):
+    def do_GET(self):
+        # Para simular el comportamiento de Vercel, redirigimos todas las peticiones
+        # al archivo index.py si no son archivos estáticos
+        
+        if self.path.endswith(STATIC_EXTS):
+            # Servir archivos estáticos directamente
+            return super().do_GET()
+        else:
+            # Cualquier otra ruta se redirige a la aplicación Flask
+            self.send_response(200)
+            self.send_header('Content-type', 'text/html')
+            self.end_headers()
             
-            self.wfile.write(message.encode())
+            # En un entorno real, aquí invocaríamos a la aplicación Flask
+            # Por simplicidad, solo mostramos un mensaje informativo con la ruta pedida
+            self.wfile.write(PAGE_PREFIX)
+            self.wfile.write(html.escape(self.path).encode())
+            self.wfile.write(PAGE_SUFFIX)
             return
 
+class ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Atiende cada conexión en su propio hilo, así un cliente lento no bloquea a los demás."""
+    daemon_threads = True
+    allow_reuse_address = True
+
 def run_server():
-    with socketserver.TCPServer(("", PORT), VercelHandler) as httpd:
+    with ThreadingServer(("", PORT), VercelHandler) as httpd:
         print(f"Simulando servidor Vercel en http://localhost:{PORT}")
         print("Ctrl+C para detener")
         httpd.serve_forever()